@@ -2,7 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from ..views import (CategoryViewSet, CodeTokenClass, CommentViewSet,
-                     GenreViewSet, ReviewViewSet, TitleViewSet, UserViewSet)
+                     DeletionJobViewSet, ExportViewSet, GenreViewSet,
+                     ReviewViewSet, TitleViewSet, UserViewSet)
 
 router = DefaultRouter()
 
@@ -11,6 +12,8 @@ router.register(r'users', UserViewSet, basename='user_for_admin')
 router.register(r'categories', CategoryViewSet)
 router.register(r'genres', GenreViewSet)
 router.register(r'titles', TitleViewSet)
+router.register(r'export', ExportViewSet, basename='export')
+router.register(r'deletions', DeletionJobViewSet, basename='deletions')
 router.register(
     r'titles/(?P<title_id>\d+)/reviews',
     ReviewViewSet, basename='reviews'
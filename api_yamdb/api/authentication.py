@@ -0,0 +1,128 @@
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+from .cache import get_cache
+
+CLAIMS = ('username', 'role', 'is_superuser')
+# Состояние пользователя, по которому проверяется токен на чтении.
+STATE_FIELDS = CLAIMS + ('is_active', 'token_version')
+VERSION_CLAIM = 'ver'
+
+
+def state_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def get_access_token(user):
+    """Токен доступа с ролью и версией токенов пользователя в claims."""
+    token = AccessToken.for_user(user)
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def forget_user(user_id):
+    """Сбрасывает закэшированное состояние пользователя."""
+    get_cache().delete(state_key(user_id))
+
+
+def get_user_state(user_id):
+    """Роль, активность и версия токенов пользователя или None.
+
+    Источник — БД: кэш на AUTH_USER_CACHE_TIMEOUT только экономит
+    запрос, и после вытеснения состояние снова читается из БД,
+    а не берётся из claims. В другом процессе с отдельным кэшем
+    отзыв токена запаздывает не больше чем на этот срок.
+    """
+    cache = get_cache()
+    state = cache.get(state_key(user_id))
+    if state is None:
+        state = User.objects.filter(pk=user_id).values(*STATE_FIELDS).first()
+        if state is not None:
+            cache.set(
+                state_key(user_id), state, settings.AUTH_USER_CACHE_TIMEOUT
+            )
+    return state
+
+
+def check_token_version(validated_token, version):
+    """Отклоняет токены, выданные до последней смены прав."""
+    if validated_token.get(VERSION_CLAIM, 0) != version:
+        raise AuthenticationFailed(
+            'Токен отозван: права пользователя изменились.',
+            code='token_revoked',
+        )
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь из закэшированного состояния без загрузки модели."""
+
+    def __init__(self, token, state):
+        super().__init__(token)
+        self.state = state
+
+    def __str__(self):
+        return self.username
+
+    @property
+    def username(self):
+        return self.state['username']
+
+    @property
+    def role(self):
+        return self.state['role']
+
+    @property
+    def is_superuser(self):
+        return self.state['is_superuser']
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без загрузки модели пользователя на чтении.
+
+    Для GET, HEAD и OPTIONS роль, активность и версия токенов берутся
+    из get_user_state, для записи пользователь читается из БД, как
+    в JWTAuthentication. В обоих случаях токен с устаревшей версией,
+    токен удалённого или неактивного пользователя отклоняются.
+    """
+
+    def authenticate(self, request):
+        if request.method not in SAFE_METHODS:
+            return super().authenticate(request)
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return self.get_claims_user(validated_token), validated_token
+
+    def get_claims_user(self, validated_token):
+        state = get_user_state(
+            validated_token.get(api_settings.USER_ID_CLAIM)
+        )
+        if state is None:
+            raise AuthenticationFailed(
+                'User not found', code='user_not_found'
+            )
+        if not state['is_active']:
+            raise AuthenticationFailed(
+                'User is inactive', code='user_inactive'
+            )
+        check_token_version(validated_token, state['token_version'])
+        return ClaimsUser(validated_token, state)
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if not isinstance(user, User):
+            raise AuthenticationFailed('User not found')
+        check_token_version(validated_token, user.token_version)
+        return user
@@ -0,0 +1,257 @@
+from abc import ABC, abstractmethod
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from reviews.db import BATCH_SIZE, bulk_insert
+from reviews.models import Category, Genre, GenreTitle, Title
+from reviews.rankings import refresh_rankings
+
+from .conditional import mark_changed
+from .permissions import IsAdmin
+
+
+def duplicates(values):
+    return {value for value, count in Counter(values).items() if count > 1}
+
+
+def add_error(errors, index, field, message):
+    errors[index].setdefault(field, []).append(message)
+
+
+class BulkWriteMixin(ABC):
+    """Пакетная запись списком объектов: POST <ресурс>/bulk/.
+
+    Сначала проверяется вся пачка, и ошибки возвращаются с индексами
+    элементов. Запись идёт одной транзакцией и только если ошибок нет.
+    """
+    bulk_serializer_class = None
+
+    @action(
+        detail=False, methods=['post'],
+        url_path='bulk', permission_classes=(IsAdmin,)
+    )
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise serializers.ValidationError(
+                {'detail': 'Ожидается список объектов.'}
+            )
+        if len(items) > settings.API_BULK_MAX_ITEMS:
+            raise serializers.ValidationError({'detail': (
+                f'Не больше {settings.API_BULK_MAX_ITEMS} объектов за запрос.'
+            )})
+        validated, errors = self.validate_items(items)
+        self.check_items(validated, errors)
+        failed = [
+            {'index': index, 'errors': error}
+            for index, error in enumerate(errors) if error
+        ]
+        if failed:
+            return Response(
+                {'errors': failed}, status=status.HTTP_400_BAD_REQUEST
+            )
+        with transaction.atomic():
+            result = self.write_items(validated)
+        self.invalidate_cache()
+        return Response(result, status=status.HTTP_200_OK)
+
+    def is_update(self, item):
+        """Обновляет ли элемент существующую запись; такие элементы
+        проверяются как частичные."""
+        return False
+
+    def validate_items(self, items):
+        """Проверяет поля каждого элемента без запросов к базе."""
+        children = {
+            partial: self.bulk_serializer_class(
+                context=self.get_serializer_context(), partial=partial
+            )
+            for partial in (False, True)
+        }
+        validated, errors = [], []
+        for item in items:
+            try:
+                validated.append(
+                    children[self.is_update(item)].run_validation(item)
+                )
+                errors.append({})
+            except serializers.ValidationError as error:
+                validated.append(None)
+                detail = error.detail
+                errors.append(
+                    detail if isinstance(detail, dict)
+                    else {'non_field_errors': detail}
+                )
+        return validated, errors
+
+    @abstractmethod
+    def check_items(self, items, errors):
+        """Проверяет пачку целиком; None в items — элемент с ошибкой.
+
+        Ошибки добавляются в errors по индексу элемента.
+        """
+
+    @abstractmethod
+    def write_items(self, items):
+        """Записывает проверенную пачку и возвращает тело ответа."""
+
+
+class SlugBulkWriteMixin(BulkWriteMixin):
+    """Создаёт новые и переименовывает существующие записи по slug.
+
+    Записи, скрытые до фонового удаления, не обновляются: их slug
+    занят, пока обработчик не удалит запись.
+    """
+
+    def check_items(self, items, errors):
+        model = self.queryset.model
+        valid = [item for item in items if item is not None]
+        repeated_slugs = duplicates(item['slug'] for item in valid)
+        repeated_names = duplicates(item['name'] for item in valid)
+        taken_names = dict(
+            model.objects.filter(name__in=[item['name'] for item in valid])
+            .values_list('name', 'slug')
+        )
+        hidden = set(model.objects.filter(
+            slug__in=[item['slug'] for item in valid], is_hidden=True
+        ).values_list('slug', flat=True))
+        for index, item in enumerate(items):
+            if item is None:
+                continue
+            if item['slug'] in hidden:
+                add_error(errors, index, 'slug', (
+                    'Запись удаляется, slug освободится после удаления.'
+                ))
+            if item['slug'] in repeated_slugs:
+                add_error(errors, index, 'slug', 'Slug повторяется в пачке.')
+            if item['name'] in repeated_names:
+                add_error(errors, index, 'name', 'Имя повторяется в пачке.')
+            if taken_names.get(item['name'], item['slug']) != item['slug']:
+                add_error(errors, index, 'name', 'Имя уже занято.')
+
+    def write_items(self, items):
+        model = self.queryset.model
+        existing = model.objects.in_bulk(
+            [item['slug'] for item in items], field_name='slug'
+        )
+        created, updated = [], []
+        for item in items:
+            instance = existing.get(item['slug'])
+            if instance is None:
+                created.append(model(**item))
+            elif instance.name != item['name']:
+                instance.name = item['name']
+                updated.append(instance)
+        bulk_insert(model, created)
+        model.objects.bulk_update(updated, ['name'], batch_size=BATCH_SIZE)
+        return {'created': len(created), 'updated': len(updated)}
+
+
+class TitleBulkWriteMixin(BulkWriteMixin):
+    """Создаёт произведения без id и обновляет произведения с id.
+
+    У обновляемых произведений меняются только переданные поля;
+    жанры заменяются, только если передан genre. Категории и жанры
+    ищутся одним запросом на модель для всей пачки.
+    """
+
+    def is_update(self, item):
+        return isinstance(item, dict) and item.get('id') is not None
+
+    def check_items(self, items, errors):
+        valid = [item for item in items if item is not None]
+        categories = dict(Category.objects.visible().filter(
+            slug__in={item['category'] for item in valid if 'category' in item}
+        ).values_list('slug', 'id'))
+        genres = dict(Genre.objects.visible().filter(
+            slug__in={slug for item in valid for slug in item.get('genre', ())}
+        ).values_list('slug', 'id'))
+        ids = [item['id'] for item in valid if 'id' in item]
+        existing = set(
+            Title.objects.visible().filter(pk__in=ids)
+            .values_list('pk', flat=True)
+        )
+        repeated = duplicates(ids)
+        for index, item in enumerate(items):
+            if item is None:
+                continue
+            self.check_category(item, index, errors, categories)
+            self.check_genre(item, index, errors, genres)
+            self.check_id(item, index, errors, existing, repeated)
+
+    def check_category(self, item, index, errors, categories):
+        # Новым произведениям category и genre обязательны, это
+        # проверяет сериализатор; обновления могут их не передавать.
+        if 'category' not in item:
+            return
+        item['category_id'] = categories.get(item.pop('category'))
+        if item['category_id'] is None:
+            add_error(errors, index, 'category', 'Категория не найдена.')
+
+    def check_genre(self, item, index, errors, genres):
+        if 'genre' not in item:
+            return
+        slugs = item.pop('genre')
+        missing = [slug for slug in slugs if slug not in genres]
+        if missing:
+            add_error(errors, index, 'genre', (
+                f'Жанры не найдены: {", ".join(missing)}.'
+            ))
+        item['genre_ids'] = {genres.get(slug) for slug in slugs}
+
+    def check_id(self, item, index, errors, existing, repeated):
+        if 'id' not in item:
+            return
+        if item['id'] not in existing:
+            add_error(errors, index, 'id', 'Произведение не найдено.')
+        if item['id'] in repeated:
+            add_error(errors, index, 'id', 'id повторяется в пачке.')
+
+    def write_items(self, items):
+        existing = Title.objects.select_for_update().in_bulk(
+            [item['id'] for item in items if 'id' in item]
+        )
+        created, updated, fields = [], [], set()
+        links = []
+        for item in items:
+            genre_ids = item.pop('genre_ids', None)
+            if 'id' in item:
+                title = existing[item.pop('id')]
+                for field, value in item.items():
+                    setattr(title, field, value)
+                fields.update(item)
+                updated.append(title)
+            else:
+                title = Title(**item)
+                created.append(title)
+            if genre_ids is not None:
+                links.append((title, genre_ids))
+        # Жанры заменяются только у обновлений, где передан genre.
+        relinked = [title.pk for title, _ in links if title.pk is not None]
+        self.create_titles(created)
+        if fields:
+            Title.objects.bulk_update(
+                updated, sorted(fields), batch_size=BATCH_SIZE
+            )
+        GenreTitle.objects.filter(title_id__in=relinked).delete()
+        bulk_insert(GenreTitle, [
+            GenreTitle(title_id=title.pk, genre_id=genre_id)
+            for title, genre_ids in links for genre_id in genre_ids
+        ])
+        # bulk_update не шлёт сигналы, рейтинг и отметки об изменении
+        # обновляются здесь.
+        refresh_rankings(title.pk for title in updated)
+        mark_changed(*(f'title:{title.pk}' for title in updated))
+        return {'created': len(created), 'updated': len(updated)}
+
+    def create_titles(self, titles):
+        # id новых строк после bulk_create известны только на PostgreSQL.
+        if connection.features.can_return_ids_from_bulk_insert:
+            bulk_insert(Title, titles)
+            return
+        for title in titles:
+            title.save()
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import cached_property
+
+from .compression import compress, pick_encoding
+from .replicas import use_primary
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def version_key(resource):
+    return f'api:version:{resource}'
+
+
+def get_version(resource):
+    """Текущая версия ресурса; меняется при каждой записи.
+
+    Начальное значение берётся от текущего времени, а не с единицы:
+    если счётчик вытеснят из кэша, новая версия не совпадёт со старыми
+    и не поднимет из кэша устаревшие ответы.
+    """
+    cache = get_cache()
+    key = version_key(resource)
+    version = cache.get(key)
+    if version is not None:
+        return version
+    cache.add(key, time.time_ns(), timeout=None)
+    return cache.get(key)
+
+
+def bumped_key(resource):
+    return f'api:bumped:{resource}'
+
+
+def invalidate(*resources):
+    """Увеличивает версии ресурсов, отключая все их кэшированные ответы.
+
+    DB_STICKY_SECONDS после этого ресурс читается из default: реплика
+    могла ещё не получить запись, а её ответ закэшировался бы под
+    новой версией.
+    """
+    cache = get_cache()
+    for resource in resources:
+        try:
+            cache.incr(version_key(resource))
+        except ValueError:
+            get_version(resource)
+        cache.set(bumped_key(resource), True, settings.DB_STICKY_SECONDS)
+
+
+def invalidate_on_commit(*resources):
+    """invalidate после фиксации текущей транзакции записи.
+
+    Версия, поднятая до COMMIT, позволила бы параллельному чтению
+    закэшировать старые строки уже под новой версией. Вне транзакции
+    сбрасывает кэш сразу.
+    """
+    transaction.on_commit(partial(invalidate, *resources))
+
+
+def recently_invalidated(resource):
+    return bool(get_cache().get(bumped_key(resource)))
+
+
+def response_key(resource, request):
+    # Тип ответа входит в ключ: от него зависит отрисованное тело.
+    media_type = getattr(request, 'accepted_media_type', '')
+    path = hashlib.md5(
+        f'{request.get_full_path()}|{media_type}'.encode()
+    ).hexdigest()
+    return f'api:response:{resource}:{get_version(resource)}:{path}'
+
+
+class CachedResponse(HttpResponse):
+    """Ответ с готовым телом в кодировке, которую принимает клиент."""
+
+    def __init__(self, bodies, content_type, request):
+        encoding = pick_encoding(
+            bodies, request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        super().__init__(bodies[encoding], content_type=content_type)
+        self.bodies = bodies
+        if encoding != 'identity':
+            self['Content-Encoding'] = encoding
+        patch_vary_headers(self, ('Accept-Encoding',))
+
+    @cached_property
+    def data(self):
+        """Разобранное тело, как у Response DRF."""
+        return json.loads(self.bodies['identity'])
+
+
+class CachedListMixin:
+    """Кэширует отрисованные ответы по полному адресу запроса.
+
+    Вместе с телом хранятся его копии в gzip и brotli, поэтому
+    попадание в кэш отдаёт готовые байты без рендеринга и сжатия.
+    cache_resource — имя ресурса, версия которого входит в ключ;
+    cache_invalidates — ресурсы, чьи ответы устаревают при записи
+    через этот viewset.
+    """
+    cache_resource = None
+    cache_invalidates = ()
+    cache_anonymous_only = False
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if recently_invalidated(self.cache_resource):
+            use_primary()
+        if self.cache_anonymous_only and request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        renderer = request.accepted_renderer
+        if renderer.format != 'json':
+            # Страница браузерного API зависит от пользователя и CSRF.
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = response_key(self.cache_resource, request)
+        bodies = cache.get(key)
+        if bodies is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            bodies = compress(renderer.render(
+                response.data, request.accepted_media_type,
+                self.get_renderer_context(),
+            ))
+            cache.set(key, bodies, settings.API_CACHE_TIMEOUT)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        return CachedResponse(bodies, content_type, request)
+
+    def invalidate_cache(self):
+        invalidate_on_commit(self.cache_resource, *self.cache_invalidates)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.invalidate_cache()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.invalidate_cache()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self.invalidate_cache()
@@ -0,0 +1,50 @@
+import gzip
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    # Без пакета Brotli ответы сжимаются только gzip.
+    brotli = None
+
+# Порядок предпочтения, если клиент принимает несколько кодировок.
+ENCODINGS = ('br', 'gzip')
+
+
+def compress(body):
+    """Тело ответа без сжатия и в каждой доступной кодировке.
+
+    Короткие тела, меньше API_COMPRESS_MIN_SIZE байт, не сжимаются:
+    заголовки и словарь кодировки съедят выигрыш.
+    """
+    bodies = {'identity': body}
+    if len(body) < settings.API_COMPRESS_MIN_SIZE:
+        return bodies
+    bodies['gzip'] = gzip.compress(body, compresslevel=settings.API_GZIP_LEVEL)
+    if brotli is not None:
+        bodies['br'] = brotli.compress(
+            body, mode=brotli.MODE_TEXT, quality=settings.API_BROTLI_QUALITY
+        )
+    return bodies
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    encodings = set()
+    for item in header.lower().split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q=') and params[2:].strip('0.') == '':
+            continue
+        encodings.add(coding.strip())
+    return encodings
+
+
+def pick_encoding(bodies, header):
+    """Лучшая из готовых кодировок, которую принимает клиент."""
+    accepted = accepted_encodings(header)
+    for encoding in ENCODINGS:
+        if encoding in bodies and (encoding in accepted or '*' in accepted):
+            return encoding
+    return 'identity'
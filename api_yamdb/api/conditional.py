@@ -0,0 +1,103 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+from django.db.models import Count, Max
+from django.utils import timezone as django_timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from reviews.models import ResourceChange
+
+from .cache import get_version
+
+
+def mark_changed(*resources):
+    """Запоминает в БД время правки или удаления в ресурсах.
+
+    Отметки хранятся в таблице, а не в кэше: вытеснение или другой
+    процесс не должны возвращать старый ETag.
+    """
+    now = django_timezone.now()
+    for resource in resources:
+        if not ResourceChange.objects.filter(resource=resource).update(
+            changed=now
+        ):
+            ResourceChange.objects.bulk_create(
+                [ResourceChange(resource=resource, changed=now)],
+                ignore_conflicts=True,
+            )
+
+
+def get_changed(resources):
+    """Время последней отметки среди ресурсов или None."""
+    changed = ResourceChange.objects.filter(
+        resource__in=resources
+    ).aggregate(changed=Max('changed'))['changed']
+    return changed and changed.timestamp()
+
+
+def weak_etag(value):
+    """Слабый ETag: тело в gzip, brotli и без сжатия отличается
+    байтами, но не содержимым, и валидатор у них общий."""
+    return f'W/{quote_etag(value)}'
+
+
+def catalog_validators(resource, request):
+    """ETag по версии ресурса, которая меняется при каждой записи."""
+    renderer = request.accepted_renderer.format
+    return weak_etag(f'{resource}-{get_version(resource)}-{renderer}'), None
+
+
+def latest_validators(queryset, resources, request):
+    """Валидаторы по числу записей, последней дате и времени правок.
+
+    Новые записи сдвигают max(pub_date) и число записей, удаления
+    меняют число, а правки записей, их родителя и авторов отмечаются
+    в resources через mark_changed.
+    """
+    state = queryset.order_by().aggregate(
+        count=Count('pk'), latest=Max('pub_date')
+    )
+    moments = [state['latest'].timestamp()] if state['latest'] else []
+    changed = get_changed(resources)
+    if changed is not None:
+        moments.append(changed)
+    renderer = request.accepted_renderer.format
+    if not moments:
+        return weak_etag(f"{state['count']}-{renderer}"), None
+    last_modified = max(moments)
+    etag = weak_etag(f"{state['count']}-{last_modified:.6f}-{renderer}")
+    return etag, datetime.fromtimestamp(last_modified, timezone.utc)
+
+
+class ConditionalGetMixin(ABC):
+    """Отвечает 304 на If-None-Match и If-Modified-Since до сериализации.
+
+    Для просмотра одной записи viewset вызывает conditional_response
+    из своего retrieve.
+    """
+
+    @abstractmethod
+    def get_validators(self, request):
+        """Пара (etag, last_modified); last_modified может быть None."""
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        # Кэши должны различать ответы по кодировке и для 304.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
@@ -0,0 +1,111 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from reviews.models import GenreTitle, Review, Title
+
+DEFAULT_CHUNK_SIZE = 2000
+MAX_CHUNK_SIZE = 10000
+
+
+def to_line(row):
+    return json.dumps(row, ensure_ascii=False, cls=DjangoJSONEncoder) + '\n'
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_titles(chunk_size=DEFAULT_CHUNK_SIZE):
+    """Произведения построчно в NDJSON.
+
+    Строки читаются серверным курсором, жанры подгружаются одним
+    запросом на пачку, поэтому память не зависит от размера таблицы.
+    """
+    rows = (
+        Title.objects.visible().order_by('pk')
+        .values(
+            'id', 'name', 'year', 'category__slug', 'category__is_hidden',
+            'description', 'score_sum', 'reviews_count',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in chunked(rows, chunk_size):
+        genres = {}
+        links = GenreTitle.objects.filter(
+            title_id__in=[row['id'] for row in chunk],
+            genre__is_hidden=False,
+        ).values_list('title_id', 'genre__slug')
+        for title_id, slug in links:
+            genres.setdefault(title_id, []).append(slug)
+        for row in chunk:
+            yield to_line({
+                'id': row['id'],
+                'name': row['name'],
+                'year': row['year'],
+                'category': (
+                    None if row['category__is_hidden']
+                    else row['category__slug']
+                ),
+                'genre': genres.get(row['id'], []),
+                'description': row['description'],
+                'rating': Title.calculate_rating(
+                    row['score_sum'], row['reviews_count']
+                ),
+            })
+
+
+def export_reviews(since=None, since_id=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Отзывы построчно в NDJSON в порядке (pub_date, id).
+
+    since отбирает отзывы не раньше этого момента, поэтому отзывы
+    с той же датой, что у последнего полученного, не теряются. С since_id
+    выгрузка продолжается строго после отзыва (since, since_id) без
+    повторов. Отзывы произведений, скрытых до удаления, не выгружаются.
+    """
+    reviews = Review.objects.filter(title__is_hidden=False).order_by(
+        'pub_date', 'pk'
+    )
+    if since is not None:
+        reviews = reviews.filter(pub_date__gte=since)
+        if since_id is not None:
+            reviews = reviews.filter(
+                Q(pub_date__gt=since) | Q(pk__gt=since_id)
+            )
+    rows = reviews.values(
+        'id', 'title_id', 'author__username', 'text', 'score', 'pub_date',
+    ).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield to_line({
+            'id': row['id'],
+            'title': row['title_id'],
+            'author': row['author__username'],
+            'text': row['text'],
+            'score': row['score'],
+            # DjangoJSONEncoder обрезает время до миллисекунд, а since
+            # сравнивается с pub_date точно.
+            'pub_date': row['pub_date'].isoformat(),
+        })
+
+
+def encode(lines):
+    for line in lines:
+        yield line.encode()
+
+
+def gzip_stream(lines):
+    """Сжимает поток строк gzip по мере отдачи."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for line in lines:
+        data = compressor.compress(line.encode())
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast
+from reviews.models import GenreTitle, Title
+
+from .cache import get_cache, get_version
+
+FACETS = ('genre', 'category', 'year')
+
+
+def genre_counts(titles):
+    return GenreTitle.objects.filter(
+        title__in=titles, genre__is_hidden=False
+    ).values(
+        facet=Value('genre', output_field=CharField()),
+        facet_key=F('genre__slug'),
+        facet_name=F('genre__name'),
+    ).annotate(count=Count('title', distinct=True)).order_by()
+
+
+def category_counts(titles):
+    return Title.objects.filter(
+        pk__in=titles, category__is_hidden=False
+    ).values(
+        facet=Value('category', output_field=CharField()),
+        facet_key=F('category__slug'),
+        facet_name=F('category__name'),
+    ).annotate(count=Count('pk')).order_by()
+
+
+def year_counts(titles):
+    # Десятилетие приводится к строке, чтобы столбцы совпали в UNION.
+    decade = Cast(F('year') / 10 * 10, CharField())
+    return Title.objects.filter(
+        pk__in=titles, year__isnull=False
+    ).values(
+        facet=Value('year', output_field=CharField()),
+        facet_key=decade,
+        facet_name=decade,
+    ).annotate(count=Count('pk')).order_by()
+
+
+FACET_COUNTS = {
+    'genre': genre_counts,
+    'category': category_counts,
+    'year': year_counts,
+}
+
+
+def facet_counts(queryset, names):
+    """Число произведений выборки по жанрам, категориям и десятилетиям.
+
+    Группировки по каждому фасету собираются в один запрос через
+    UNION ALL, выборка входит в него подзапросом.
+    """
+    titles = queryset.order_by().values('pk')
+    parts = [FACET_COUNTS[name](titles) for name in FACETS if name in names]
+    facets = {name: [] for name in FACETS if name in names}
+    if not parts:
+        return facets
+    for row in parts[0].union(*parts[1:], all=True):
+        if row['facet'] == 'year':
+            facets['year'].append(
+                {'decade': int(row['facet_key']), 'count': row['count']}
+            )
+        else:
+            facets[row['facet']].append({
+                'slug': row['facet_key'], 'name': row['facet_name'],
+                'count': row['count'],
+            })
+    for name, items in facets.items():
+        if name == 'year':
+            items.sort(key=lambda item: item['decade'])
+        else:
+            items.sort(key=lambda item: (-item['count'], item['slug']))
+    return facets
+
+
+def catalog_facets(names):
+    """Фасеты всего каталога из кэша.
+
+    Сводка считается сразу по всем фасетам и сбрасывается вместе
+    с версией ресурса facets при записи произведений, жанров
+    и категорий.
+    """
+    cache = get_cache()
+    key = f'api:facets:{get_version("facets")}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = facet_counts(Title.objects.visible(), FACETS)
+        cache.set(key, facets, settings.API_CACHE_TIMEOUT)
+    return {name: facets[name] for name in FACETS if name in names}
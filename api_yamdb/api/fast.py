@@ -0,0 +1,173 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.response import Response
+from reviews.models import GenreTitle, Title
+
+DATETIME = serializers.DateTimeField()
+
+
+def datetime_column(name):
+    get = itemgetter(name)
+    return lambda row: DATETIME.to_representation(get(row))
+
+
+def constant(value):
+    return lambda row: value
+
+
+class Rows(ABC):
+    """Строки списка из values() в том же виде, что у сериализатора.
+
+    Подкласс задаёт columns — поля для values() — и get_accessors.
+    """
+    columns = ()
+
+    @abstractmethod
+    def get_accessors(self, rows):
+        """Пары (ключ ответа, функция от строки) в порядке полей
+        сериализатора."""
+
+    def build(self, rows):
+        accessors = self.get_accessors(rows)
+        return [{key: get(row) for key, get in accessors} for row in rows]
+
+
+class TitleRows(Rows):
+    """Ответ TitleReadSerializer с учётом fields и expand."""
+    field_names = (
+        'id', 'name', 'year', 'category', 'genre', 'description', 'rating'
+    )
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = [
+            name for name in self.field_names
+            if fields is None or name in fields
+        ]
+        self.nested = {
+            name for name in ('genre', 'category')
+            if expand is None or name in expand
+        }
+        columns = {'id'}
+        for name in self.fields:
+            columns.update(self.field_columns(name))
+        self.columns = sorted(columns)
+
+    def field_columns(self, name):
+        if name == 'category':
+            if name in self.nested:
+                return (
+                    'category__name', 'category__slug', 'category__is_hidden'
+                )
+            return ('category__slug', 'category__is_hidden')
+        if name == 'rating':
+            return ('score_sum', 'reviews_count')
+        if name == 'genre':
+            return ()
+        return (name,)
+
+    def load_genres(self, rows):
+        """Жанры страницы одним запросом, в порядке сортировки Genre.
+
+        Жанры, скрытые до удаления, не отдаются.
+        """
+        genres = defaultdict(list)
+        links = (
+            GenreTitle.objects.filter(
+                title_id__in=[row['id'] for row in rows],
+                genre__is_hidden=False,
+            )
+            .order_by('genre__name')
+            .values_list('title_id', 'genre__name', 'genre__slug')
+        )
+        nested = 'genre' in self.nested
+        for title_id, name, slug in links:
+            genres[title_id].append(
+                {'name': name, 'slug': slug} if nested else slug
+            )
+        return genres
+
+    def get_accessors(self, rows):
+        genres = self.load_genres(rows) if 'genre' in self.fields else {}
+        accessors = {
+            'genre': lambda row: genres.get(row['id'], []),
+            'category': self.category,
+            'rating': lambda row: Title.calculate_rating(
+                row['score_sum'], row['reviews_count']
+            ),
+        }
+        return [
+            (name, accessors.get(name) or itemgetter(name))
+            for name in self.fields
+        ]
+
+    def category(self, row):
+        slug = row['category__slug']
+        if row['category__is_hidden']:
+            return None
+        if slug is None or 'category' not in self.nested:
+            return slug
+        return {'name': row['category__name'], 'slug': slug}
+
+
+class ReviewRows(Rows):
+    """Ответ ReviewSerializer для отзывов одного произведения."""
+    columns = ('id', 'text', 'author__username', 'score', 'pub_date')
+
+    def __init__(self, title):
+        self.title = title
+
+    def get_accessors(self, rows):
+        return [
+            ('id', itemgetter('id')),
+            ('text', itemgetter('text')),
+            ('author', itemgetter('author__username')),
+            ('score', itemgetter('score')),
+            ('pub_date', datetime_column('pub_date')),
+            ('title', constant(self.title.name)),
+        ]
+
+
+class CommentRows(Rows):
+    """Ответ CommentSerializer для комментариев одного отзыва."""
+    columns = ('id', 'text', 'author__username', 'pub_date')
+
+    def __init__(self, review):
+        self.review = review
+
+    def get_accessors(self, rows):
+        return [
+            ('id', itemgetter('id')),
+            ('text', itemgetter('text')),
+            ('author', itemgetter('author__username')),
+            ('pub_date', datetime_column('pub_date')),
+            ('review', constant(self.review.text)),
+        ]
+
+
+class FastListMixin(ABC):
+    """Список без сериализатора: строки из values() собираются в ответ.
+
+    Отключается настройкой API_FAST_LIST.
+    """
+
+    @abstractmethod
+    def get_rows(self):
+        """Объект Rows для текущего запроса."""
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_FAST_LIST:
+            return super().list(request, *args, **kwargs)
+        rows = self.get_rows()
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .prefetch_related(None)
+            .values(*rows.columns)
+        )
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(rows.build(list(queryset)))
+        return self.get_paginated_response(rows.build(page))
@@ -1,6 +1,35 @@
 import django_filters
+from django.db.models import Exists, F, OuterRef
+from django_filters.constants import EMPTY_VALUES
 from django_filters.rest_framework import filters
-from reviews.models import Title
+from reviews.models import Category, Genre, GenreTitle, Title
+from reviews.search import search_titles
+from reviews.slugs import find_slugs
+
+
+def split_slugs(value):
+    """Слаги из значения через запятую в нижнем регистре."""
+    return tuple(sorted({
+        slug.strip().lower() for slug in value.split(',') if slug.strip()
+    }))
+
+
+class TitleOrderingFilter(filters.OrderingFilter):
+    """Сортировка, при которой произведения без оценок идут в конце."""
+
+    def get_ordering_value(self, param):
+        descending = param.startswith('-')
+        param = param[1:] if descending else param
+        field = F(self.param_map.get(param, param))
+        if descending:
+            return field.desc(nulls_last=True)
+        return field.asc(nulls_last=True)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        ordering = [self.get_ordering_value(param) for param in value]
+        return qs.order_by(*ordering, 'pk')
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -8,19 +37,106 @@ class TitleFilter(django_filters.FilterSet):
         field_name='year',
         lookup_expr='exact'
     )
+    year_min = filters.NumberFilter(
+        field_name='year',
+        lookup_expr='gte'
+    )
+    year_max = filters.NumberFilter(
+        field_name='year',
+        lookup_expr='lte'
+    )
+    rating_min = filters.NumberFilter(
+        field_name='avg_score',
+        lookup_expr='gte'
+    )
+    rating_max = filters.NumberFilter(
+        field_name='avg_score',
+        lookup_expr='lte'
+    )
     name = filters.CharFilter(
         field_name='name',
         lookup_expr='icontains'
     )
-    category = django_filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='iexact'
+    category = django_filters.CharFilter(method='filter_category')
+    genre = django_filters.CharFilter(method='filter_genre')
+    genre_mode = django_filters.ChoiceFilter(
+        choices=(('any', 'Любой из жанров'), ('all', 'Все жанры')),
+        method='filter_genre_mode',
     )
-    genre = django_filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='iexact'
+    search = filters.CharFilter(method='filter_search')
+    ordering = TitleOrderingFilter(
+        fields=(
+            ('avg_score', 'rating'),
+            ('year', 'year'),
+            ('name', 'name'),
+        )
     )
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('name', 'year', 'category', 'genre', 'description')
+
+    @staticmethod
+    def uses_rating(params):
+        """Нужна ли аннотация avg_score для этих параметров запроса."""
+        return bool(
+            params.get('rating_min') or params.get('rating_max')
+            or 'rating' in params.get('ordering', '')
+        )
+
+    def slug_ids(self, model, value):
+        """id видимых записей по слагам через запятую, без учёта регистра.
+
+        Слаги разрешаются одним запросом по индексу на UPPER(slug),
+        результат запоминается на запросе клиента: фасеты фильтруют
+        выборку повторно. Неизвестные слаги в результат не попадают.
+        """
+        slugs = split_slugs(value)
+        if not slugs:
+            return {}
+        key = (model._meta.label, slugs)
+        cache = getattr(self.request, 'slug_ids', None)
+        if cache is None:
+            cache = {}
+            if self.request is not None:
+                self.request.slug_ids = cache
+        if key not in cache:
+            cache[key] = {
+                slug.lower(): pk for slug, pk in find_slugs(
+                    model.objects.visible(), slugs
+                ).values_list('slug', 'pk')
+            }
+        return cache[key]
+
+    def filter_category(self, queryset, name, value):
+        ids = self.slug_ids(Category, value)
+        return queryset.filter(category_id__in=ids.values())
+
+    def filter_genre(self, queryset, name, value):
+        """Фильтр по жанрам через EXISTS, без соединения и DISTINCT.
+
+        В режиме all каждому жанру соответствует своя проверка
+        по индексу genre_title_idx, и неизвестный жанр даёт пустую
+        выборку.
+        """
+        ids = self.slug_ids(Genre, value)
+        mode = self.form.cleaned_data.get('genre_mode') or 'any'
+        if not ids or mode == 'all' and len(ids) < len(split_slugs(value)):
+            return queryset.none()
+        links = GenreTitle.objects.filter(title=OuterRef('pk'))
+        if mode == 'any':
+            return queryset.annotate(
+                in_genre=Exists(links.filter(genre_id__in=ids.values()))
+            ).filter(in_genre=True)
+        for pk in ids.values():
+            queryset = queryset.annotate(**{
+                f'in_genre_{pk}': Exists(links.filter(genre_id=pk))
+            }).filter(**{f'in_genre_{pk}': True})
+        return queryset
+
+    def filter_genre_mode(self, queryset, name, value):
+        # Режим учитывается в filter_genre.
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
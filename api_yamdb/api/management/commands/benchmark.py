@@ -0,0 +1,113 @@
+import json
+
+from benchmarks import data, runner
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from reviews.models import Title
+
+
+class DisableMigrations:
+    """Таблицы тестовой базы создаются прямо по моделям, без миграций."""
+
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт тестовую базу с синтетическими данными и замеряет '
+        'p50/p95, пропускную способность и число SQL-запросов '
+        'для каждого маршрута API.'
+    )
+
+    def add_arguments(self, parser):
+        defaults = data.DatasetSize()
+        for field, default in defaults.as_dict().items():
+            parser.add_argument(
+                '--' + field.replace('_', '-'), type=int, default=default,
+                help=f'Размер набора данных (по умолчанию {default}).'
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Замеряемых запросов на маршрут.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Прогревочных запросов на маршрут.'
+        )
+        parser.add_argument(
+            '--as', dest='as_user', choices=('admin', 'anonymous'),
+            default='admin', help='От чьего имени выполнять запросы.'
+        )
+        parser.add_argument(
+            '--only', action='append',
+            help='Замерять только маршруты, в имени которых есть строка.'
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Куда записать результаты в JSON.'
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого прогона для сравнения.'
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять тестовую базу и переиспользовать её данные.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть больше нуля.')
+        size = data.DatasetSize(**{
+            field: options[field] for field in data.DatasetSize().as_dict()
+        })
+        old_name = connection.settings_dict['NAME']
+        with override_settings(MIGRATION_MODULES=DisableMigrations()):
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, keepdb=options['keepdb']
+            )
+        try:
+            if not Title.objects.exists():
+                self.stdout.write('Генерация данных...')
+                data.generate(size, seed=options['seed'])
+            results = runner.run(
+                requests=options['requests'],
+                warmup=options['warmup'],
+                as_user=options['as_user'],
+                only=options['only'],
+            )
+            serialization = runner.serialization_cost()
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+        report = runner.build_report(
+            results, size, options['seed'], options['as_user'], serialization
+        )
+        runner.write_report(report, options['output'])
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name}: {result["status"]}, p50 {result["p50_ms"]} мс, '
+                f'p95 {result["p95_ms"]} мс, '
+                f'{result["throughput_rps"]} запр/с, '
+                f'SQL: {result["queries"]}'
+            )
+        for name, cost in serialization.items():
+            self.stdout.write(
+                f'{name}: сборка списка {cost["serializer_us_per_row"]} мкс '
+                f'на строку, values() — {cost["fast_us_per_row"]} мкс'
+            )
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            for line in runner.compare(report, baseline):
+                self.stdout.write(line)
+        self.stdout.write(
+            self.style.SUCCESS(f'Результаты записаны в {options["output"]}')
+        )
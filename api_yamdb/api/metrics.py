@@ -0,0 +1,112 @@
+import bisect
+import threading
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1000, 10000, 100000, 1000000, 10000000)
+
+
+def format_labels(labels):
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Series:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Гистограмма в духе Prometheus с метками (route, method).
+
+    Значения хранятся в памяти процесса: при нескольких воркерах
+    gunicorn каждый отдаёт свою статистику.
+    """
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = Series(len(self.buckets) + 1)
+            series.counts[index] += 1
+            series.total += value
+            series.count += 1
+
+    def render(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self.lock:
+            snapshot = sorted(
+                (labels, list(series.counts), series.total, series.count)
+                for labels, series in self.series.items()
+            )
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                bucket_labels = format_labels(labels + (('le', bound),))
+                yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+            yield f'{self.name}_sum{format_labels(labels)} {total}'
+            yield f'{self.name}_count{format_labels(labels)} {count}'
+
+
+REQUEST_DURATION = Histogram(
+    'yamdb_request_duration_seconds',
+    'Полное время обработки запроса.',
+    DURATION_BUCKETS,
+)
+VIEW_DURATION = Histogram(
+    'yamdb_view_duration_seconds',
+    'Время работы view и сериализаторов без учёта запросов к БД.',
+    DURATION_BUCKETS,
+)
+RENDER_DURATION = Histogram(
+    'yamdb_render_duration_seconds',
+    'Время рендеринга ответа.',
+    DURATION_BUCKETS,
+)
+DB_DURATION = Histogram(
+    'yamdb_db_duration_seconds',
+    'Суммарное время SQL-запросов за запрос.',
+    DURATION_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'yamdb_db_queries',
+    'Число SQL-запросов за запрос.',
+    QUERY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'yamdb_response_size_bytes',
+    'Размер тела ответа.',
+    SIZE_BUCKETS,
+)
+HISTOGRAMS = (
+    REQUEST_DURATION, VIEW_DURATION, RENDER_DURATION,
+    DB_DURATION, DB_QUERIES, RESPONSE_SIZE,
+)
+
+
+def render_metrics():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,84 @@
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.db import connections
+
+from .metrics import (DB_DURATION, DB_QUERIES, RENDER_DURATION,
+                      REQUEST_DURATION, RESPONSE_SIZE, VIEW_DURATION)
+
+
+class QueryTimer:
+    """Считает SQL-запросы и их время через execute_wrapper."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - started
+            self.count += 1
+
+
+class PerformanceMiddleware:
+    """Замеряет время запроса по частям для заголовка Server-Timing
+    и гистограмм /metrics.
+
+    view — время view и сериализаторов без SQL, render — рендеринг
+    ответа DRF, db — время и число SQL-запросов на всех подключениях.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = perf_counter()
+        timer = QueryTimer()
+        request.view_started = request.view_finished = None
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(timer)
+                )
+            response = self.get_response(request)
+        finished = perf_counter()
+        # Если view не вызывался (например, 404), его время нулевое.
+        view_started = request.view_started or finished
+        view_finished = request.view_finished or finished
+        timings = {
+            'db': timer.duration,
+            'view': max(view_finished - view_started - timer.duration, 0),
+            'render': finished - view_finished,
+            'total': finished - started,
+        }
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={duration * 1000:.2f}'
+            for name, duration in timings.items()
+        ) + f', queries;desc="{timer.count}"'
+        self.observe(request, response, timings, timer.count)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_started = perf_counter()
+
+    def process_template_response(self, request, response):
+        # Вызывается после view и до рендеринга ответа DRF.
+        request.view_finished = perf_counter()
+        return response
+
+    def observe(self, request, response, timings, queries):
+        match = request.resolver_match
+        labels = (
+            ('route', match.view_name if match else 'unresolved'),
+            ('method', request.method),
+        )
+        REQUEST_DURATION.observe(labels, timings['total'])
+        VIEW_DURATION.observe(labels, timings['view'])
+        RENDER_DURATION.observe(labels, timings['render'])
+        DB_DURATION.observe(labels, timings['db'])
+        DB_QUERIES.observe(labels, queries)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(labels, len(response.content))
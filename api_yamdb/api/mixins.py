@@ -1,4 +1,9 @@
-from rest_framework import mixins, viewsets
+from rest_framework import mixins, status, viewsets
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from reviews.deletion import schedule_deletion
+
+from .serializers import DeletionJobSerializer
 
 
 class ListCreateDestroyViewSet(
@@ -8,3 +13,22 @@ class ListCreateDestroyViewSet(
     viewsets.GenericViewSet,
 ):
     pass
+
+
+class BackgroundDestroyMixin:
+    """Удаление в фоне: запись сразу скрывается из ответов, а она и
+    зависимые строки удаляются обработчиком run_deletion_worker.
+
+    Отвечает 202 с заданием, ход которого виден в /deletions/{id}/.
+    """
+
+    def destroy(self, request, *args, **kwargs):
+        job = schedule_deletion(self.get_object())
+        self.invalidate_cache()
+        return Response(
+            DeletionJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse(
+                'deletions-detail', args=[job.pk], request=request
+            )},
+        )
@@ -0,0 +1,129 @@
+import base64
+import binascii
+from collections import OrderedDict
+from functools import partial
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from reviews.paginator import ApproximateCountPaginator
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    """Постраничный вывод без точного COUNT(*) на больших выборках.
+
+    count_approximate в ответе показывает, что count — оценка
+    планировщика PostgreSQL, а не точное число записей.
+    """
+    django_paginator_class = ApproximateCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_approximate', self.page.paginator.approximate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class KeysetPagination(ApproximateCountPagination):
+    """Постраничный вывод по ключу (дата, id) без COUNT и OFFSET.
+
+    Включается параметром ?cursor= (пустое значение — первая страница),
+    без него работает обычная постраничная навигация. Каждая следующая
+    страница выбирается условием по ключу последней записи, поэтому
+    стоит одинаково в начале и в конце списка.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    ordering = ('pub_date', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(
+            request.query_params[self.cursor_query_param]
+        )
+        if position is not None:
+            queryset = queryset.filter(self.after(*position))
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.results = results[:page_size]
+        return self.results
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.results[-1])
+        )
+
+    @property
+    def key_fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def after(self, value, pk):
+        """Условие «строго после (value, pk)» в порядке сортировки.
+
+        Записано как value <= x AND (value < x OR id < pk), чтобы
+        первое условие задавало границу диапазона по индексу.
+        """
+        field, tie_breaker = self.key_fields
+        lookup = 'lt' if self.ordering[0].startswith('-') else 'gt'
+        return Q(**{f'{field}__{lookup}e': value}) & (
+            Q(**{f'{field}__{lookup}': value})
+            | Q(**{f'{tie_breaker}__{lookup}': pk})
+        )
+
+    def encode_cursor(self, instance):
+        field, tie_breaker = self.key_fields
+        # Быстрый список отдаёт строки values() вместо объектов.
+        get = instance.get if isinstance(instance, dict) else partial(
+            getattr, instance
+        )
+        position = '{}|{}'.format(get(field).isoformat(), get(tie_breaker))
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            value, pk = base64.urlsafe_b64decode(
+                cursor.encode()
+            ).decode().split('|')
+            value = parse_datetime(value)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+
+class ReviewPagination(KeysetPagination):
+    ordering = ('-pub_date', '-id')
+
+
+class CommentPagination(KeysetPagination):
+    ordering = ('pub_date', 'id')
@@ -0,0 +1,122 @@
+import hashlib
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+state = threading.local()
+# До какого момента реплика считается недоступной, по псевдониму.
+down_until = {}
+# Cookie, по которой анонимный клиент читает из default после записи.
+STICKY_COOKIE = 'db_sticky'
+
+
+def sticky_key(request):
+    """Ключ клиента с токеном; анонимы отмечаются cookie STICKY_COOKIE.
+
+    Адрес клиента не подходит: за nginx у всех анонимов он один.
+    """
+    token = request.META.get('HTTP_AUTHORIZATION')
+    if not token:
+        return None
+    return 'db:sticky:' + hashlib.md5(token.encode()).hexdigest()
+
+
+def is_sticky(request):
+    key = sticky_key(request)
+    if key is None:
+        return STICKY_COOKIE in request.COOKIES
+    return bool(caches[settings.API_CACHE_ALIAS].get(key))
+
+
+def stick(request, response):
+    """Отправляет чтение клиента в default на DB_STICKY_SECONDS."""
+    key = sticky_key(request)
+    if key is None:
+        response.set_cookie(
+            STICKY_COOKIE, '1', max_age=settings.DB_STICKY_SECONDS,
+            httponly=True, samesite='Lax',
+        )
+        return
+    caches[settings.API_CACHE_ALIAS].set(
+        key, True, settings.DB_STICKY_SECONDS
+    )
+
+
+def use_primary():
+    """Переводит оставшееся чтение текущего запроса в default."""
+    state.read_alias = None
+
+
+def is_healthy(alias):
+    if down_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        down_until[alias] = (
+            time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+        )
+        return False
+    return True
+
+
+def choose_replica():
+    """Реплика по весам среди доступных или None, если таких нет."""
+    replicas = dict(settings.DB_REPLICAS)
+    while replicas:
+        alias = random.choices(
+            list(replicas), weights=list(replicas.values())
+        )[0]
+        if is_healthy(alias):
+            return alias
+        del replicas[alias]
+    return None
+
+
+class ReplicaMiddleware:
+    """Выбирает реплику для чтения на время безопасного запроса.
+
+    После записи клиент DB_STICKY_SECONDS читает из default, чтобы
+    сразу увидеть свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DB_REPLICAS:
+            return self.get_response(request)
+        safe = request.method in SAFE_METHODS
+        if safe and not is_sticky(request):
+            state.read_alias = choose_replica()
+        try:
+            response = self.get_response(request)
+        finally:
+            state.read_alias = None
+        if not safe and response.status_code < 400:
+            stick(request, response)
+        return response
+
+
+class ReplicaRouter:
+    """Чтение с реплики, выбранной ReplicaMiddleware, запись в default."""
+
+    def db_for_read(self, model, **hints):
+        alias = getattr(state, 'read_alias', None)
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
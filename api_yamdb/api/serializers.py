@@ -1,8 +1,8 @@
 import datetime
 
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
-from reviews.models import Category, Code, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Code, Comment, DeletionJob, Genre,
+                            Review, Title, TitleStats, User)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -70,8 +70,35 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 class TitleReadSerializer(serializers.ModelSerializer):
-    genre = GenreSerializer(many=True, read_only=True)
-    category = CategorySerializer(read_only=True)
+    """Произведение для чтения.
+
+    В контексте можно передать fields — набор отдаваемых полей, и
+    expand — связи, которые вкладываются целиком. Если expand передан,
+    остальные связи отдаются слагами.
+    """
+    genre = GenreSerializer(
+        source='visible_genres', many=True, read_only=True
+    )
+    category = CategorySerializer(source='visible_category', read_only=True)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        expand = self.context.get('expand')
+        if expand is None:
+            return
+        if 'genre' in self.fields and 'genre' not in expand:
+            self.fields['genre'] = serializers.SlugRelatedField(
+                source='visible_genres', slug_field='slug', many=True,
+                read_only=True,
+            )
+        if 'category' in self.fields and 'category' not in expand:
+            self.fields['category'] = serializers.SlugRelatedField(
+                source='visible_category', slug_field='slug', read_only=True
+            )
 
     class Meta:
         model = Title
@@ -88,10 +115,10 @@ class TitleReadSerializer(serializers.ModelSerializer):
 
 class TitleWriteSerializer(serializers.ModelSerializer):
     genre = serializers.SlugRelatedField(
-        queryset=Genre.objects.all(), slug_field='slug', many=True
+        queryset=Genre.objects.visible(), slug_field='slug', many=True
     )
     category = serializers.SlugRelatedField(
-        queryset=Category.objects.all(), slug_field='slug'
+        queryset=Category.objects.visible(), slug_field='slug'
     )
 
     class Meta:
@@ -107,6 +134,42 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         return value
 
 
+class TitleBulkSerializer(TitleWriteSerializer):
+    """Элемент пакетной записи: связи передаются слагами без запросов.
+
+    Слаги проверяются одним запросом на всю пачку в api.bulk.
+    """
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+
+class CategoryBulkSerializer(CategorySerializer):
+
+    class Meta(CategorySerializer.Meta):
+        # Уникальность проверяется одним запросом на всю пачку.
+        extra_kwargs = {'name': {'validators': []}, 'slug': {'validators': []}}
+
+
+class GenreBulkSerializer(GenreSerializer):
+
+    class Meta(GenreSerializer.Meta):
+        extra_kwargs = {'name': {'validators': []}, 'slug': {'validators': []}}
+
+
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Статистика отзывов произведения из счётчиков TitleStats."""
+    reviews_count = serializers.ReadOnlyField()
+    rating = serializers.ReadOnlyField()
+    scores = serializers.ReadOnlyField()
+
+    class Meta:
+        fields = (
+            'title', 'reviews_count', 'comments_count', 'rating', 'scores'
+        )
+        model = TitleStats
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор для отзывов."""
 
@@ -129,12 +192,11 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         request = self.context['request']
-        author = request.user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
         if (
             request.method == 'POST'
-            and Review.objects.filter(title=title, author=author).exists()
+            and Review.objects.filter(
+                title=self.context['title'], author_id=request.user.id
+            ).exists()
         ):
             raise serializers.ValidationError(
                 'Можно оставить только один отзыв'
@@ -161,3 +223,14 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date', 'review')
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    """Ход фонового удаления записи."""
+
+    class Meta:
+        fields = (
+            'id', 'model', 'object_id', 'object_repr', 'step',
+            'processed', 'created', 'finished',
+        )
+        model = DeletionJob
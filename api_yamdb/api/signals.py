@@ -0,0 +1,79 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.db import bulk_loaded
+from reviews.deletion import deletion_finished
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+from .authentication import forget_user
+from .cache import invalidate, invalidate_on_commit
+from .conditional import mark_changed
+
+CACHE_RESOURCES = {
+    Category: ('categories', 'titles', 'facets'),
+    Genre: ('genres', 'titles', 'facets'),
+    Title: ('titles', 'facets'),
+    GenreTitle: ('titles', 'facets'),
+    # Отзывы меняют рейтинг в ответах произведений.
+    Review: ('titles',),
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_on_write(sender, **kwargs):
+    resources = CACHE_RESOURCES.get(sender)
+    if resources:
+        invalidate_on_commit(*resources)
+
+
+@receiver(bulk_loaded)
+@receiver(deletion_finished)
+def invalidate_on_bulk_write(sender, **kwargs):
+    # Импорт и обработчик удаления работают в других процессах; версии
+    # доходят до узлов web через общий кэш (CACHE_BACKEND).
+    resources = CACHE_RESOURCES.get(sender)
+    if resources:
+        invalidate(*resources)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_on_genre_change(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_on_commit('titles', 'facets')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def mark_reviews_changed(sender, instance, created=False, **kwargs):
+    # Новые отзывы видны по pub_date, отмечаются правки и удаления;
+    # текст отзыва показывается в его комментариях.
+    if not created:
+        mark_changed(f'reviews:{instance.title_id}', f'review:{instance.pk}')
+
+
+@receiver(post_save, sender=Title)
+def mark_title_changed(sender, instance, created, **kwargs):
+    # Название произведения показывается в его отзывах.
+    if not created:
+        mark_changed(f'title:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def mark_comments_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        mark_changed(f'comments:{instance.review_id}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_on_write(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def mark_users_changed(sender, instance, **kwargs):
+    # Имена авторов показываются в отзывах и комментариях.
+    if instance.renamed:
+        mark_changed('users')
@@ -1,26 +1,47 @@
 import uuid
+from functools import partial
 
-from django.core.mail import send_mail
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, permissions, status, viewsets
+from rest_framework import filters, permissions, serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Code, Comment, Genre, Review, Title, User
+from rest_framework.views import APIView
+from reviews.models import (Category, Code, Comment, DeletionJob, Genre,
+                            Review, SimilarTitle, Title, TitleRanking,
+                            TitleStats, User)
+from reviews.outbox import enqueue_email
 
 from api_yamdb.settings import DOMAIN_NAME
 
+from .authentication import get_access_token
+from .bulk import SlugBulkWriteMixin, TitleBulkWriteMixin
+from .cache import CachedListMixin
+from .compression import accepted_encodings
+from .conditional import (ConditionalGetMixin, catalog_validators,
+                          latest_validators)
+from .export import (DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, encode,
+                     export_reviews, export_titles, gzip_stream)
+from .facets import FACETS, catalog_facets, facet_counts
+from .fast import CommentRows, FastListMixin, ReviewRows, TitleRows
 from .filters import TitleFilter
-from .mixins import ListCreateDestroyViewSet
+from .metrics import render_metrics
+from .mixins import BackgroundDestroyMixin, ListCreateDestroyViewSet
+from .pagination import CommentPagination, ReviewPagination
 from .permissions import (IsAdmin, IsAdminModeratorOwnerOrReadOnly,
                           IsAdminOrReadOnly, NobodyAllow)
-from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, ReviewSerializer,
-                          TitleReadSerializer, TitleWriteSerializer,
-                          TokenGeneratorSerialiser, UserForUserSerializer,
-                          UserSerializer)
+from .serializers import (CategoryBulkSerializer, CategorySerializer,
+                          CommentSerializer, DeletionJobSerializer,
+                          GenreBulkSerializer, GenreSerializer,
+                          ReviewSerializer, TitleBulkSerializer,
+                          TitleReadSerializer, TitleStatsSerializer,
+                          TitleWriteSerializer, TokenGeneratorSerialiser,
+                          UserForUserSerializer, UserSerializer)
 
 EMAIL_THEME = 'Подтверждающий код для API YAMDB'
 EMAIL_FROM = f'from@{DOMAIN_NAME}'
@@ -49,26 +70,16 @@ class CodeTokenClass(viewsets.ModelViewSet):
                     user=user,
                     confirmation_code=confirmation_code
                 )
-                send_mail(
-                    EMAIL_THEME,
-                    confirmation_code,
-                    EMAIL_FROM,
-                    [email],
-                    fail_silently=False,
+                enqueue_email(
+                    EMAIL_THEME, confirmation_code, EMAIL_FROM, email
                 )
                 return Response(request.data, status=status.HTTP_200_OK)
         user = get_object_or_404(User, username=username, email=email)
-        Code.objects.update(
+        Code.objects.update_or_create(
             user=user,
-            confirmation_code=confirmation_code
-        )
-        send_mail(
-            EMAIL_THEME,
-            confirmation_code,
-            EMAIL_FROM,
-            [email],
-            fail_silently=False,
+            defaults={'confirmation_code': confirmation_code}
         )
+        enqueue_email(EMAIL_THEME, confirmation_code, EMAIL_FROM, email)
         return Response(request.data, status=status.HTTP_200_OK)
 
     @action(
@@ -81,14 +92,16 @@ class CodeTokenClass(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         username = request.data['username']
         user_valid = get_object_or_404(User, username=username)
-        if Code.DoesNotExist:
+        if not Code.objects.filter(
+            user=user_valid,
+            confirmation_code=request.data.get('confirmation_code'),
+        ).exists():
             return Response(
                 {'message': 'Проверь confirmation_code'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        refresh = RefreshToken.for_user(user_valid)
         return Response({
-            'token': str(refresh.access_token),
+            'token': str(get_access_token(user_valid)),
         })
 
 
@@ -110,7 +123,7 @@ class UserViewSet(viewsets.ModelViewSet):
         url_path='me', permission_classes=(IsAuthenticated, )
     )
     def user_rool_users_detail(self, request, username=None):
-        user = get_object_or_404(User, username=self.request.user)
+        user = get_object_or_404(User, pk=request.user.id)
         if request.method == 'PATCH':
             serializer = UserForUserSerializer(
                 user, data=request.data, partial=True)
@@ -122,88 +135,432 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
-    queryset = Category.objects.all()
+class CategoryViewSet(
+    ConditionalGetMixin, CachedListMixin, SlugBulkWriteMixin,
+    BackgroundDestroyMixin, ListCreateDestroyViewSet
+):
+    queryset = Category.objects.visible()
     serializer_class = CategorySerializer
+    bulk_serializer_class = CategoryBulkSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ("name",)
     lookup_field = "slug"
+    cache_resource = 'categories'
+    cache_invalidates = ('titles', 'facets')
+
+    def get_validators(self, request):
+        return catalog_validators(self.cache_resource, request)
 
     def perform_create(self, serializer):
         serializer.save(
             name=self.request.data["name"], slug=self.request.data["slug"]
         )
+        self.invalidate_cache()
 
-    def perform_destroy(self, serializer):
-        serializer = get_object_or_404(Category, slug=self.kwargs.get("slug"))
-        serializer.delete()
 
-
-class GenreViewSet(ListCreateDestroyViewSet):
-    queryset = Genre.objects.all()
+class GenreViewSet(
+    ConditionalGetMixin, CachedListMixin, SlugBulkWriteMixin,
+    BackgroundDestroyMixin, ListCreateDestroyViewSet
+):
+    queryset = Genre.objects.visible()
     serializer_class = GenreSerializer
+    bulk_serializer_class = GenreBulkSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ("name",)
     lookup_field = "slug"
+    cache_resource = 'genres'
+    cache_invalidates = ('titles', 'facets')
+
+    def get_validators(self, request):
+        return catalog_validators(self.cache_resource, request)
 
     def perform_create(self, serializer):
         serializer.save(
             name=self.request.data["name"], slug=self.request.data["slug"]
         )
+        self.invalidate_cache()
 
-    def perform_destroy(self, serializer):
-        serializer = get_object_or_404(Genre, slug=self.kwargs.get("slug"))
-        serializer.delete()
 
-
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(
+    ConditionalGetMixin, CachedListMixin, TitleBulkWriteMixin,
+    FastListMixin, BackgroundDestroyMixin, viewsets.ModelViewSet
+):
+    queryset = (
+        Title.objects.visible().select_related('category')
+        .prefetch_related('genre')
+        .with_rating()
+    )
     serializer_class = TitleWriteSerializer
+    bulk_serializer_class = TitleBulkSerializer
+    # Столбцы, которые нужны для каждого поля ответа.
+    field_columns = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'category': ('category',),
+        'genre': (),
+        'description': ('description',),
+        'rating': ('score_sum', 'reviews_count'),
+    }
+    expandable = ('genre', 'category')
     permission_classes = (
         IsAdminOrReadOnly,
         permissions.IsAuthenticatedOrReadOnly,
     )
     filter_backends = [DjangoFilterBackend]
     filterset_class = TitleFilter
+    cache_resource = 'titles'
+    cache_invalidates = ('facets',)
+    cache_anonymous_only = True
 
     def get_serializer_class(self):
         if self.request.method in ['POST', 'PATCH']:
             return TitleWriteSerializer
         return TitleReadSerializer
 
+    def get_query_list(self, param, allowed):
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = names - set(allowed)
+        if unknown:
+            raise serializers.ValidationError({
+                param: f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+            })
+        return names
+
+    @cached_property
+    def requested_fields(self):
+        """Поля из ?fields= или None, если нужны все.
+
+        Пустой ?fields= тоже означает все поля, а не пустые объекты.
+        """
+        return self.get_query_list('fields', self.field_columns) or None
+
+    @cached_property
+    def requested_expand(self):
+        """Связи из ?expand= или None, если вкладываются все."""
+        return self.get_query_list('expand', self.expandable)
+
+    @cached_property
+    def requested_facets(self):
+        """Фасеты из ?facets= или None, если они не нужны."""
+        return self.get_query_list('facets', FACETS)
+
+    def get_queryset(self):
+        if self.request.method not in permissions.SAFE_METHODS:
+            return super().get_queryset()
+        fields = self.requested_fields or self.field_columns
+        queryset = Title.objects.visible()
+        if 'category' in fields:
+            queryset = queryset.select_related('category')
+        if 'genre' in fields:
+            queryset = queryset.prefetch_related('genre')
+        if TitleFilter.uses_rating(self.request.query_params):
+            queryset = queryset.with_rating()
+        if self.requested_fields is None:
+            return queryset
+        return queryset.only('id', *(
+            column for field in fields for column in self.field_columns[field]
+        ))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in permissions.SAFE_METHODS:
+            context['fields'] = self.requested_fields
+            context['expand'] = self.requested_expand
+        return context
+
+    def get_facets(self):
+        """Фасеты выборки; без фильтров — готовая сводка из кэша."""
+        params = self.request.query_params
+        filtered = any(
+            params.get(name) for name in TitleFilter.base_filters
+            if name != 'ordering'
+        )
+        if not filtered:
+            return catalog_facets(self.requested_facets)
+        return facet_counts(
+            self.filter_queryset(self.get_queryset()), self.requested_facets
+        )
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.requested_facets:
+            response.data['facets'] = self.get_facets()
+        return response
+
+    def get_rows(self):
+        return TitleRows(self.requested_fields, self.requested_expand)
+
+    def get_validators(self, request):
+        return catalog_validators(self.cache_resource, request)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            partial(self.cached_response, super().retrieve),
+            request, *args, **kwargs
+        )
+
+    def get_limit(self, maximum):
+        try:
+            limit = int(self.request.query_params.get(
+                'limit', settings.TOP_DEFAULT_LIMIT
+            ))
+        except ValueError:
+            raise serializers.ValidationError(
+                {'limit': 'Должно быть целым числом.'}
+            )
+        return min(max(limit, 1), maximum)
+
+    def scored_titles(self, rows, title_field):
+        """Произведения из строк рейтинга вместе с их оценкой score."""
+        context = self.get_serializer_context()
+        data = []
+        for row in rows:
+            item = TitleReadSerializer(
+                getattr(row, title_field), context=context
+            ).data
+            item['score'] = round(row.score, 2)
+            data.append(item)
+        return data
+
+    @action(detail=False, methods=['get'], url_path='top')
+    def top(self, request):
+        """Лучшие произведения по байесовской средней оценке.
+
+        Читает готовую таблицу TitleRanking по индексу, без сортировки
+        всех произведений.
+        """
+        genre = request.query_params.get('genre')
+        category = request.query_params.get('category')
+        rankings = (
+            TitleRanking.objects.filter(genre__slug=genre) if genre
+            else TitleRanking.objects.filter(genre__isnull=True)
+        )
+        if category:
+            rankings = rankings.filter(category__slug=category)
+        rankings = (
+            rankings.filter(title__is_hidden=False)
+            .select_related('title__category')
+            .prefetch_related('title__genre')
+            .order_by('-score', 'title_id')
+        )
+        return Response(self.scored_titles(
+            rankings[:self.get_limit(settings.TOP_MAX_LIMIT)], 'title'
+        ))
+
+    @action(detail=True, methods=['get'], url_path='similar')
+    def similar(self, request, pk=None):
+        """Похожие произведения из таблицы, которую строит
+        build_similar_titles."""
+        if not pk.isdigit():
+            raise Http404
+        links = list(
+            SimilarTitle.objects.filter(
+                title_id=pk,
+                title__is_hidden=False,
+                similar__is_hidden=False,
+            )
+            .select_related('similar__category')
+            .prefetch_related('similar__genre')
+            .order_by('-score', 'similar_id')
+            [:self.get_limit(settings.SIMILAR_TOP_K)]
+        )
+        if not links:
+            get_object_or_404(Title.objects.visible(), pk=pk)
+        return Response(self.scored_titles(links, 'similar'))
+
+    @action(detail=True, methods=['get'], url_path='stats')
+    def stats(self, request, pk=None):
+        """Распределение оценок, число отзывов и комментариев."""
+        if not pk.isdigit():
+            raise Http404
+        stats = TitleStats.objects.filter(
+            title_id=pk, title__is_hidden=False
+        ).first()
+        if stats is None:
+            # Строка появляется с первым отзывом или комментарием.
+            stats = TitleStats(
+                title=get_object_or_404(Title.objects.visible(), pk=pk)
+            )
+        return Response(TitleStatsSerializer(stats).data)
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet
+):
     """API для работы с моделью отзывов."""
     queryset = Review.objects.all()
 
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminModeratorOwnerOrReadOnly,)
+    pagination_class = ReviewPagination
+
+    @cached_property
+    def title(self):
+        """Произведение из URL, загружается один раз за запрос."""
+        return get_object_or_404(
+            Title.objects.visible(), id=self.kwargs.get('title_id')
+        )
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        # Менеджер связи проставляет отзывам уже загруженное произведение.
+        return self.title.reviews.select_related('author')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['title'] = self.title
+        return context
+
+    def get_rows(self):
+        return ReviewRows(self.title)
+
+    def get_validators(self, request):
+        # Отзывы показывают название произведения и имена авторов.
+        pk = self.title.pk
+        return latest_validators(
+            self.get_queryset(), [f'reviews:{pk}', f'title:{pk}', 'users'],
+            request,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
 
     def perform_create(self, serializer):
-        title = get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet
+):
     """API для работы с моделью комментариев."""
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = (IsAdminModeratorOwnerOrReadOnly,)
+    pagination_class = CommentPagination
+
+    @cached_property
+    def review(self):
+        """Отзыв из URL, загружается один раз за запрос."""
+        return get_object_or_404(
+            Review,
+            pk=self.kwargs.get('review_id'),
+            title=self.kwargs.get('title_id'),
+            title__is_hidden=False,
+        )
 
     def get_queryset(self):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        return review.comments.all()
+        return self.review.comments.select_related('author')
+
+    def get_rows(self):
+        return CommentRows(self.review)
+
+    def get_validators(self, request):
+        # Комментарии показывают текст отзыва и имена авторов.
+        pk = self.review.pk
+        return latest_validators(
+            self.get_queryset(), [f'comments:{pk}', f'review:{pk}', 'users'],
+            request,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id, title=title_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.review)
+
+
+class DeletionJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Ход фонового удаления произведений, категорий и жанров."""
+    queryset = DeletionJob.objects.all()
+    serializer_class = DeletionJobSerializer
+    permission_classes = (IsAdmin,)
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """Выгрузка данных целиком в NDJSON для аналитики."""
+    permission_classes = (IsAdmin,)
+
+    def get_chunk_size(self):
+        try:
+            chunk_size = int(self.request.query_params.get(
+                'chunk_size', DEFAULT_CHUNK_SIZE
+            ))
+        except ValueError:
+            raise serializers.ValidationError(
+                {'chunk_size': 'Должно быть целым числом.'}
+            )
+        return min(max(chunk_size, 1), MAX_CHUNK_SIZE)
+
+    def get_since(self):
+        since = self.request.query_params.get('since')
+        if not since:
+            return None
+        value = parse_datetime(since)
+        if value is None:
+            raise serializers.ValidationError(
+                {'since': 'Ожидается дата и время в формате ISO 8601.'}
+            )
+        return value
+
+    def get_since_id(self):
+        since_id = self.request.query_params.get('since_id')
+        if not since_id:
+            return None
+        try:
+            return int(since_id)
+        except ValueError:
+            raise serializers.ValidationError(
+                {'since_id': 'Должно быть целым числом.'}
+            )
+
+    def stream(self, lines, filename):
+        accepted = accepted_encodings(
+            self.request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        accepts_gzip = 'gzip' in accepted or '*' in accepted
+        response = StreamingHttpResponse(
+            gzip_stream(lines) if accepts_gzip else encode(lines),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        if accepts_gzip:
+            response['Content-Encoding'] = 'gzip'
+        response['Vary'] = 'Accept-Encoding'
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+    @action(detail=False, methods=['get'])
+    def titles(self, request):
+        return self.stream(
+            export_titles(self.get_chunk_size()), 'titles.ndjson'
+        )
+
+    @action(detail=False, methods=['get'])
+    def reviews(self, request):
+        return self.stream(
+            export_reviews(
+                self.get_since(), self.get_since_id(), self.get_chunk_size()
+            ),
+            'reviews.ndjson',
+        )
+
+
+class MetricsView(APIView):
+    """Гистограммы производительности в формате Prometheus."""
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return HttpResponse(
+            render_metrics(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
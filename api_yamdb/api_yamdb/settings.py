@@ -24,12 +24,15 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_filters',
     'rest_framework_simplejwt',
-    'api',
+    'api.apps.ApiConfig',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,7 +68,7 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.postgresql'),
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
@@ -74,6 +77,82 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: DB_REPLICAS=host1:5432*3,host2 (вес после *).
+# Для SQLite вместо адреса указывается путь к файлу базы.
+# Безопасные запросы читают с реплик, запись и запросы пользователя
+# в течение DB_STICKY_SECONDS после его записи идут в default.
+DB_REPLICAS = {}
+DB_STICKY_SECONDS = int(os.getenv('DB_STICKY_SECONDS', 5))
+DB_REPLICA_RETRY_SECONDS = 30
+
+
+def replica_settings(location):
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if replica['ENGINE'].endswith('sqlite3'):
+        replica['NAME'] = location
+    else:
+        replica['HOST'], _, replica['PORT'] = location.partition(':')
+    return replica
+
+
+for number, entry in enumerate(os.getenv('DB_REPLICAS', '').split(','), 1):
+    if entry.strip():
+        location, _, weight = entry.strip().partition('*')
+        DATABASES[f'replica{number}'] = replica_settings(location)
+        DB_REPLICAS[f'replica{number}'] = int(weight or 1)
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+
+# Cache
+# Кэш в памяти процесса годится только для одного процесса: версии
+# ответов API не переходят между процессами gunicorn и обработчиками.
+# docker-compose задаёт общий Redis:
+# CACHE_BACKEND=django_redis.cache.RedisCache
+# CACHE_LOCATION=redis://redis:6379/1
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'yamdb'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+        },
+    }
+}
+
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = 60 * 10
+# Кэшированные ответы API хранятся и в сжатом виде; тела короче
+# API_COMPRESS_MIN_SIZE байт не сжимаются. Сжатие выполняется один раз
+# при заполнении кэша, поэтому уровни выбраны высокими.
+API_COMPRESS_MIN_SIZE = 1024
+API_GZIP_LEVEL = 9
+API_BROTLI_QUALITY = 9
+API_BULK_MAX_ITEMS = 10000
+# Списки произведений, отзывов и комментариев без сериализаторов DRF.
+API_FAST_LIST = True
+# С какой оценки планировщика списки API и админки показывают
+# приблизительное число записей вместо COUNT(*).
+APPROXIMATE_COUNT_THRESHOLD = 100000
+# Сколько роль пользователя живёт в кэше аутентификации на GET-запросах.
+# С кэшем в памяти процесса другие процессы узнают об отзыве токена
+# не позже чем через этот срок, с общим кэшем — сразу.
+AUTH_USER_CACHE_TIMEOUT = 60
+# Рейтинг /titles/top/: вес средней оценки в байесовском среднем
+# (сколько «воображаемых» отзывов добавляется к каждому произведению).
+TOP_PRIOR_WEIGHT = 10
+TOP_DEFAULT_LIMIT = 10
+TOP_MAX_LIMIT = 100
+# Похожие произведения: сколько соседей хранить, вес общих жанров и
+# общих рецензентов, сколько строк матрицы считать за раз.
+SIMILAR_TOP_K = 20
+SIMILAR_GENRE_WEIGHT = 0.3
+SIMILAR_REVIEWER_WEIGHT = 0.7
+SIMILAR_CHUNK_SIZE = 256
+
 
 # Password validation
 
@@ -124,9 +203,9 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.ApproximateCountPagination',
     'PAGE_SIZE': 10,
 }
 
@@ -163,7 +242,25 @@ SIMPLE_JWT = {
 }
 
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND', 'django.core.mail.backends.filebased.EmailBackend'
+)
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# Очередь писем: manage.py run_mail_worker.
+MAIL_BATCH_SIZE = 100
+MAIL_MAX_ATTEMPTS = 5
+MAIL_RETRY_BACKOFF = 30
+# Через сколько секунд письма упавшего обработчика вернутся в очередь.
+MAIL_CLAIM_TIMEOUT = 10 * 60
+MAIL_POLL_INTERVAL = 5
+
+# Фоновое удаление произведений, категорий и жанров
+# (python manage.py run_deletion_worker).
+DELETION_BATCH_SIZE = 1000
+DELETION_POLL_INTERVAL = 5
 
 DOMAIN_NAME = 'yamdb.ru'
@@ -0,0 +1,6 @@
+"""Нагрузочные замеры API на синтетических данных.
+
+Запуск: python manage.py benchmark (см. --help). Данные создаются
+во временной тестовой базе, рабочая база не затрагивается. Для замеров
+на SQLite задайте DB_ENGINE=django.db.backends.sqlite3 и DB_NAME.
+"""
@@ -0,0 +1,98 @@
+import random
+from dataclasses import asdict, dataclass
+
+from django.db import transaction
+from reviews.db import bulk_insert
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+from reviews.ratings import recalculate_ratings
+
+
+@dataclass
+class DatasetSize:
+    users: int = 200
+    categories: int = 5
+    genres: int = 20
+    titles: int = 500
+    reviews: int = 5000
+    comments: int = 5000
+    genres_per_title: int = 3
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def generate(size, seed=0):
+    """Заполняет пустую базу воспроизводимым набором данных.
+
+    При одном и том же seed получаются одинаковые записи,
+    поэтому замеры разных коммитов сравнимы между собой.
+    """
+    rng = random.Random(seed)
+    with transaction.atomic():
+        bulk_insert(User, [
+            User(
+                username=f'user{number}',
+                email=f'user{number}@yamdb.fake',
+                role='admin' if number == 0 else 'user',
+            )
+            for number in range(size.users)
+        ])
+        bulk_insert(Category, [
+            Category(name=f'Категория {number}', slug=f'category-{number}')
+            for number in range(size.categories)
+        ])
+        bulk_insert(Genre, [
+            Genre(name=f'Жанр {number}', slug=f'genre-{number}')
+            for number in range(size.genres)
+        ])
+        # Первичные ключи после bulk_create известны не на всех СУБД,
+        # поэтому связанные записи строятся по перечитанным объектам.
+        users = list(User.objects.order_by('pk'))
+        categories = list(Category.objects.order_by('pk'))
+        genres = list(Genre.objects.order_by('pk'))
+        bulk_insert(Title, [
+            Title(
+                name=f'Произведение {number}',
+                year=rng.randint(1900, 2020),
+                category=rng.choice(categories),
+                description=f'Описание произведения {number}',
+            )
+            for number in range(size.titles)
+        ])
+        titles = list(Title.objects.order_by('pk'))
+        bulk_insert(GenreTitle, [
+            GenreTitle(title=title, genre=genre)
+            for title in titles
+            for genre in rng.sample(
+                genres, min(size.genres_per_title, len(genres))
+            )
+        ])
+        bulk_insert(Review, [
+            Review(
+                title=title,
+                author=author,
+                text=f'Отзыв {title.pk}-{author.pk}',
+                score=rng.randint(1, 10),
+            )
+            for title, author in review_pairs(rng, titles, users, size)
+        ])
+        reviews = list(Review.objects.values_list('pk', flat=True))
+        bulk_insert(Comment, [
+            Comment(
+                review_id=rng.choice(reviews),
+                author=rng.choice(users),
+                text=f'Комментарий {number}',
+            )
+            for number in range(size.comments if reviews else 0)
+        ])
+        recalculate_ratings()
+
+
+def review_pairs(rng, titles, users, size):
+    """Пары (произведение, автор) без повторов, как требует модель."""
+    per_title, extra = divmod(size.reviews, len(titles) or 1)
+    for number, title in enumerate(titles):
+        count = min(per_title + (number < extra), len(users))
+        for author in rng.sample(users, count):
+            yield title, author
@@ -0,0 +1,276 @@
+import json
+import math
+import platform
+import subprocess
+import time
+
+import django
+from api.api_v1.urls import router
+from api.authentication import get_access_token
+from api.fast import CommentRows, ReviewRows, TitleRows
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleReadSerializer)
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+# Маршруты только с небезопасными методами (регистрация, выдача токена,
+# удаление) не замеряются: они меняют данные между повторами.
+SAFE_METHOD = 'get'
+
+# Дополнительные варианты запросов к уже существующим маршрутам.
+EXTRA_QUERIES = {
+    'title-list': (
+        '?ordering=-rating',
+        '?rating_min=5&ordering=year',
+        '?search=Произведение',
+        '?fields=id,name,rating',
+        '?expand=',
+    ),
+    'reviews-list': ('?cursor=',),
+    'comments-list': ('?cursor=',),
+}
+
+
+def percentile(values, fraction):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sample_kwargs():
+    """Значения параметров адреса для каждого маршрута."""
+    review = Review.objects.filter(comments__isnull=False).first()
+    review = review or Review.objects.first()
+    comment = Comment.objects.filter(review=review).first()
+    user = User.objects.order_by('pk').first()
+    title = review.title if review else Title.objects.first()
+    category = Category.objects.first()
+    genre = Genre.objects.first()
+    return {
+        'title_id': title and title.pk,
+        'review_id': review and review.pk,
+        'username': user and user.username,
+        'pk': {
+            'auth_users': user and user.pk,
+            'title': title and title.pk,
+            'reviews': review and review.pk,
+            'comments': comment and comment.pk,
+        },
+        'slug': {
+            'category': category and category.slug,
+            'genre': genre and genre.slug,
+        },
+    }
+
+
+def get_routes():
+    """Имена и адреса всех GET-маршрутов api/api_v1/urls.py."""
+    samples = sample_kwargs()
+    seen = set()
+    for pattern in router.urls:
+        groups = pattern.pattern.regex.groupindex
+        if pattern.name in seen or 'format' in groups:
+            continue
+        seen.add(pattern.name)
+        actions = getattr(pattern.callback, 'actions', None)
+        if actions is not None and SAFE_METHOD not in actions:
+            continue
+        basename = pattern.name.rsplit('-', 1)[0]
+        kwargs = {}
+        for name in groups:
+            value = samples[name]
+            kwargs[name] = (
+                value.get(basename) if isinstance(value, dict) else value
+            )
+        if None in kwargs.values():
+            continue
+        url = reverse(pattern.name, kwargs=kwargs)
+        yield pattern.name, url
+        for query in EXTRA_QUERIES.get(pattern.name, ()):
+            yield pattern.name + query, url + query
+
+
+def get_client(as_user):
+    client = APIClient()
+    if as_user == 'admin':
+        admin = User.objects.filter(role='admin').order_by('pk').first()
+        token = get_access_token(admin)
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def measure(client, url, requests, warmup):
+    for _ in range(warmup):
+        read_body(client.get(url))
+    timings = []
+    queries = []
+    size = status = None
+    started = time.perf_counter()
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as context:
+            begin = time.perf_counter()
+            response = client.get(url)
+            body = read_body(response)
+            timings.append(time.perf_counter() - begin)
+        queries.append(len(context))
+        size, status = len(body), response.status_code
+    elapsed = time.perf_counter() - started
+    return {
+        'url': url,
+        'status': status,
+        'requests': requests,
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+        'throughput_rps': round(requests / elapsed, 1),
+        'queries': max(queries),
+        'response_bytes': size,
+    }
+
+
+def read_body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def run(requests=50, warmup=5, as_user='admin', only=None):
+    """Замеряет все маршруты и возвращает результаты по каждому."""
+    cache.clear()
+    client = get_client(as_user)
+    results = {}
+    for name, url in get_routes():
+        if only and not any(part in name for part in only):
+            continue
+        results[name] = measure(client, url, requests, warmup)
+    return results
+
+
+def best_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def list_bodies(sample):
+    """Пары (сериализатор, быстрый путь) для тела каждого списка.
+
+    Оба варианта читают строки из базы и отдают JSON, как в запросе.
+    Списки отзывов и комментариев пропускаются, если в базе нет
+    ни одного произведения или отзыва.
+    """
+    render = JSONRenderer().render
+    titles = Title.objects.all()[:sample]
+    bodies = {
+        'titles': (
+            lambda: render(TitleReadSerializer(
+                titles.select_related('category').prefetch_related('genre'),
+                many=True,
+            ).data),
+            lambda: render(TitleRows().build(
+                list(titles.values(*TitleRows().columns))
+            )),
+        ),
+    }
+    title = Title.objects.order_by('-reviews_count').first()
+    if title is not None:
+        reviews = title.reviews.all()[:sample]
+        bodies['reviews'] = (
+            lambda: render(ReviewSerializer(
+                reviews.select_related('author'), many=True
+            ).data),
+            lambda: render(ReviewRows(title).build(
+                list(reviews.values(*ReviewRows.columns))
+            )),
+        )
+    review = (
+        Review.objects.annotate(total=Count('comments'))
+        .order_by('-total').first()
+    )
+    if review is not None:
+        comments = review.comments.all()[:sample]
+        bodies['comments'] = (
+            lambda: render(CommentSerializer(
+                comments.select_related('author'), many=True
+            ).data),
+            lambda: render(CommentRows(review).build(
+                list(comments.values(*CommentRows.columns))
+            )),
+        )
+    return bodies
+
+
+def serialization_cost(sample=500, repeat=5):
+    """Время сборки тела списка на строку: DRF и values()-путь, мкс."""
+    results = {}
+    for name, (serializer, fast) in list_bodies(sample).items():
+        count = len(json.loads(fast()))
+        if not count:
+            continue
+        results[name] = {
+            'rows': count,
+            'serializer_us_per_row': round(
+                best_time(serializer, repeat) / count * 1e6, 2
+            ),
+            'fast_us_per_row': round(best_time(fast, repeat) / count * 1e6, 2),
+        }
+    return results
+
+
+def build_report(results, size, seed, as_user, serialization=None):
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'dataset': size.as_dict(),
+            'seed': seed,
+            'user': as_user,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'endpoints': results,
+        'serialization': serialization or {},
+    }
+
+
+def write_report(report, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def compare(report, baseline):
+    """Строки сравнения p50 и числа запросов с прошлым прогоном."""
+    old = baseline.get('endpoints', {})
+    for name, result in report['endpoints'].items():
+        if name not in old:
+            continue
+        before = old[name]
+        change = (
+            (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+            if before['p50_ms'] else 0
+        )
+        yield (
+            f'{name}: p50 {before["p50_ms"]} -> {result["p50_ms"]} мс '
+            f'({change:+.1f}%), запросов к БД '
+            f'{before["queries"]} -> {result["queries"]}'
+        )
@@ -1,9 +1,35 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 
-from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+from .models import (Category, Comment, DeletionJob, Genre, GenreTitle,
+                     OutgoingEmail, Review, Title, User)
+from .paginator import ApproximateCountPaginator
 
 
-class UserAdmin(admin.ModelAdmin):
+class ApproximateCountChangeList(ChangeList):
+    """Список с оценкой числа записей вместо COUNT(*) на больших таблицах.
+
+    Приблизительное число помечается в шаблоне admin/pagination.html,
+    «Показать все» для таких списков отключается.
+    """
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.count_approximate = self.paginator.approximate
+        if self.count_approximate:
+            self.can_show_all = False
+
+
+class ApproximateCountAdmin(admin.ModelAdmin):
+    paginator = ApproximateCountPaginator
+    # Не считать все строки таблицы ради «N всего» рядом с поиском.
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return ApproximateCountChangeList
+
+
+class UserAdmin(ApproximateCountAdmin):
     list_display = (
         'username', 'email', 'first_name',
         'last_name', 'bio', 'role',
@@ -12,10 +38,46 @@ class UserAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class TitleAdmin(ApproximateCountAdmin):
+    list_display = ('name', 'year', 'category', 'reviews_count')
+    list_select_related = ('category',)
+
+
+class GenreTitleAdmin(ApproximateCountAdmin):
+    # __str__ выводит произведение и жанр.
+    list_select_related = ('title', 'genre')
+
+
+class ReviewAdmin(ApproximateCountAdmin):
+    list_display = ('text', 'title', 'author', 'score', 'pub_date')
+    list_select_related = ('title', 'author')
+
+
+class CommentAdmin(ApproximateCountAdmin):
+    list_display = ('text', 'review', 'author', 'pub_date')
+    list_select_related = ('review', 'author')
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('to', 'subject', 'created', 'attempts', 'sent_at')
+    list_filter = ('sent_at',)
+    search_fields = ('to',)
+
+
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'model', 'object_id', 'object_repr', 'step', 'processed',
+        'created', 'finished',
+    )
+    list_filter = ('model', 'finished')
+
+
 admin.site.register(User, UserAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
+admin.site.register(DeletionJob, DeletionJobAdmin)
 admin.site.register(Category)
 admin.site.register(Genre)
-admin.site.register(GenreTitle)
-admin.site.register(Title)
-admin.site.register(Review)
-admin.site.register(Comment)
+admin.site.register(GenreTitle, GenreTitleAdmin)
+admin.site.register(Title, TitleAdmin)
+admin.site.register(Review, ReviewAdmin)
+admin.site.register(Comment, CommentAdmin)
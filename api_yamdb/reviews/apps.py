@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import create_search_indexes
+        from .slugs import create_slug_indexes
+        post_migrate.connect(create_search_indexes, sender=self)
+        post_migrate.connect(create_slug_indexes, sender=self)
@@ -0,0 +1,21 @@
+from django.db import connection
+from django.dispatch import Signal
+
+BATCH_SIZE = 1000
+
+# Отправляется после массовой загрузки в обход сигналов моделей,
+# например командой import_csv; sender — загруженная модель.
+bulk_loaded = Signal()
+
+
+def bulk_insert(model, objs, batch_size=BATCH_SIZE):
+    """bulk_create пачками не больше, чем допускает СУБД.
+
+    Django 2.2 не ограничивает batch_size пределом бэкенда, и SQLite
+    отказывается вставлять больше 500 строк одним запросом.
+    """
+    objs = list(objs)
+    limit = connection.ops.bulk_batch_size(model._meta.concrete_fields, objs)
+    model.objects.bulk_create(
+        objs, batch_size=max(min(batch_size, limit), 1)
+    )
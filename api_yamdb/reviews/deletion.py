@@ -0,0 +1,123 @@
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import (Category, Comment, DeletionJob, Genre, GenreTitle, Review,
+                     SimilarTitle, Title, TitleRanking)
+
+MODELS = {'title': Title, 'category': Category, 'genre': Genre}
+
+# Отправляется после коммита последней пачки задания; sender — модель
+# удалённой записи. Пачки идут без сигналов моделей, поэтому кэш API
+# сбрасывается по этому сигналу.
+deletion_finished = Signal()
+
+
+def schedule_deletion(instance):
+    """Скрывает запись и ставит её удаление в очередь."""
+    model = type(instance)
+    with transaction.atomic():
+        model.objects.filter(pk=instance.pk).update(is_hidden=True)
+        return DeletionJob.objects.create(
+            model=model._meta.model_name,
+            object_id=instance.pk,
+            object_repr=str(instance)[:200],
+        )
+
+
+def deletion_steps(job):
+    """Шаги удаления зависимых строк до удаления самой записи.
+
+    Каждый шаг — имя, queryset строк и изменения для update;
+    None вместо изменений означает удаление строк.
+    """
+    pk = job.object_id
+    if job.model == 'title':
+        return (
+            ('comments', Comment.objects.filter(review__title_id=pk), None),
+            ('reviews', Review.objects.filter(title_id=pk), None),
+            ('genres', GenreTitle.objects.filter(title_id=pk), None),
+            ('rankings', TitleRanking.objects.filter(title_id=pk), None),
+            ('similar', SimilarTitle.objects.filter(
+                Q(title_id=pk) | Q(similar_id=pk)
+            ), None),
+        )
+    if job.model == 'category':
+        return (
+            ('titles', Title.objects.filter(category_id=pk),
+             {'category': None}),
+            ('rankings', TitleRanking.objects.filter(category_id=pk),
+             {'category': None}),
+        )
+    return (
+        ('titles', GenreTitle.objects.filter(genre_id=pk), None),
+        ('rankings', TitleRanking.objects.filter(genre_id=pk), None),
+    )
+
+
+def run_step(job, queryset, changes, batch_size):
+    """Обрабатывает строки шага со следующим диапазоном ключей.
+
+    Строки удаляются одним DELETE без загрузки в память и без сигналов:
+    рейтинг и счётчики скрытой записи уже никому не показываются.
+    Возвращает False, если строк в шаге не осталось.
+    """
+    pks = list(
+        queryset.filter(pk__gt=job.last_pk).order_by('pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    if not pks:
+        return False
+    batch = queryset.filter(
+        pk__gt=job.last_pk, pk__lte=pks[-1]
+    ).order_by()
+    if changes is None:
+        job.processed += batch._raw_delete(batch.db)
+    else:
+        job.processed += batch.update(**changes)
+    job.last_pk = pks[-1]
+    return True
+
+
+def advance(job, batch_size):
+    """Выполняет одну пачку задания или удаляет саму запись."""
+    steps = deletion_steps(job)
+    names = [name for name, _, _ in steps]
+    start = names.index(job.step) if job.step in names else 0
+    for name, queryset, changes in steps[start:]:
+        if job.step != name:
+            job.step, job.last_pk = name, 0
+        if run_step(job, queryset, changes, batch_size):
+            return
+    model = MODELS[job.model]
+    instance = model.objects.filter(pk=job.object_id).first()
+    if instance is not None:
+        instance.delete()
+    job.step = 'done'
+    job.finished = timezone.now()
+    transaction.on_commit(
+        lambda: deletion_finished.send(sender=model, job=job)
+    )
+
+
+def process_batch(batch_size):
+    """Обрабатывает пачку первого незавершённого задания.
+
+    Каждая пачка идёт отдельной короткой транзакцией вместе
+    с сохранением прогресса, поэтому блокировки держатся недолго,
+    а прерванное задание продолжается с того же места. Строка
+    задания блокируется, и несколько обработчиков берут разные
+    задания. Возвращает задание или None, если очередь пуста.
+    """
+    with transaction.atomic():
+        job = (
+            DeletionJob.objects.filter(finished__isnull=True)
+            .select_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            return None
+        advance(job, batch_size)
+        job.save()
+    return job
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.similarity import build_similar_titles
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает таблицу похожих произведений по общим жанрам '
+        'и рецензентам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int,
+            help='Сколько соседей хранить; по умолчанию SIMILAR_TOP_K.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help=(
+                'Сколько произведений обрабатывать за раз; '
+                'по умолчанию SIMILAR_CHUNK_SIZE.'
+            )
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число процессов для расчёта.'
+        )
+
+    def handle(self, *args, **options):
+        for option in ('top_k', 'chunk_size', 'workers'):
+            if options[option] is not None and options[option] < 1:
+                raise CommandError(
+                    f'--{option.replace("_", "-")} должен быть больше нуля.'
+                )
+        started = time.monotonic()
+        rows = build_similar_titles(
+            options['top_k'], options['chunk_size'], options['workers']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Строк в таблице: {rows} за {time.monotonic() - started:.1f} с'
+        ))
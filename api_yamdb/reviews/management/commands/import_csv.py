@@ -0,0 +1,259 @@
+import csv
+import os
+import time
+from contextlib import contextmanager
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from reviews.db import bulk_loaded
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+from reviews.rankings import rebuild_rankings
+from reviews.ratings import recalculate_ratings
+from reviews.stats import recalculate_stats
+
+DEFAULT_PATH = os.path.join(settings.BASE_DIR, 'static', 'data')
+DEFAULT_BATCH_SIZE = 5000
+
+
+def copy_value(value):
+    """Значение в текстовом формате COPY: \\N для NULL и экранирование."""
+    if value is None:
+        return '\\N'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Сохраняет даты из файла при bulk_create.
+
+    bulk_create подставляет текущее время в поля с auto_now_add,
+    поэтому на время импорта этот флаг снимается.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает csv-файлы из static/data пачками через bulk_create '
+        '(на PostgreSQL — через COPY).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=DEFAULT_PATH,
+            help='Каталог с csv-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одной пачке.'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL.'
+        )
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='Пропускать строки с уже существующими id (без COPY).'
+        )
+
+    def get_sources(self):
+        """Файлы в порядке зависимостей и функции разбора строк."""
+        return (
+            ('users.csv', User, self.user),
+            ('category.csv', Category, self.category),
+            ('genre.csv', Genre, self.genre),
+            ('titles.csv', Title, self.title),
+            ('genre_title.csv', GenreTitle, self.genre_title),
+            ('review.csv', Review, self.review),
+            ('comments.csv', Comment, self.comment),
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        self.batch_size = options['batch_size']
+        self.ignore_conflicts = options['ignore_conflicts']
+        self.use_copy = (
+            connection.vendor == 'postgresql'
+            and not options['no_copy']
+            and not self.ignore_conflicts
+        )
+        self.unusable_password = make_password(None)
+        # Внешние ключи проверяются по id в памяти, без запроса на строку.
+        self.ids = {
+            model: set(model.objects.values_list('id', flat=True))
+            for model in (User, Category, Genre, Title, Review)
+        }
+        loaded = []
+        for filename, model, parse in self.get_sources():
+            path = os.path.join(options['path'], filename)
+            if not os.path.exists(path):
+                self.stdout.write(
+                    self.style.WARNING(f'{filename}: файл не найден')
+                )
+                continue
+            if self.import_file(path, model, parse):
+                loaded.append(model)
+        recalculate_ratings()
+        recalculate_stats()
+        rebuild_rankings()
+        # bulk_create не шлёт сигналы, кэш API сбрасывается здесь.
+        for model in loaded:
+            bulk_loaded.send(sender=model)
+
+    def import_file(self, path, model, parse):
+        started = time.monotonic()
+        loaded = skipped = 0
+        with transaction.atomic(), keep_auto_now_add(model):
+            batch = []
+            with open(path, encoding='utf-8', newline='') as file:
+                for row in csv.DictReader(file):
+                    instance = parse(row)
+                    if instance is None:
+                        skipped += 1
+                        continue
+                    batch.append(instance)
+                    if len(batch) >= self.batch_size:
+                        loaded += self.write(model, batch)
+                        batch = []
+            if batch:
+                loaded += self.write(model, batch)
+            self.reset_sequence(model)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'{os.path.basename(path)}: {loaded} строк за {elapsed:.2f} с '
+            f'({loaded / elapsed:.0f} строк/с), пропущено: {skipped}'
+        )
+        return loaded
+
+    def write(self, model, batch):
+        if self.use_copy:
+            self.copy(model, batch)
+        else:
+            model.objects.bulk_create(
+                batch, ignore_conflicts=self.ignore_conflicts
+            )
+        if model in self.ids:
+            self.ids[model].update(instance.pk for instance in batch)
+        return len(batch)
+
+    def copy(self, model, batch):
+        fields = model._meta.concrete_fields
+        buffer = StringIO()
+        for instance in batch:
+            buffer.write('\t'.join(
+                copy_value(field.get_db_prep_save(
+                    getattr(instance, field.attname), connection
+                ))
+                for field in fields
+            ))
+            buffer.write('\n')
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN',
+                buffer,
+            )
+
+    def reset_sequence(self, model):
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def ref(self, model, value):
+        """id связанной записи или None, если её нет."""
+        if not value or int(value) not in self.ids[model]:
+            return None
+        return int(value)
+
+    def pub_date(self, row):
+        return parse_datetime(row.get('pub_date') or '') or timezone.now()
+
+    def user(self, row):
+        return User(
+            id=int(row['id']),
+            username=row['username'],
+            email=row['email'],
+            role=row.get('role') or 'user',
+            bio=row.get('bio') or None,
+            first_name=row.get('first_name') or None,
+            last_name=row.get('last_name') or None,
+            password=self.unusable_password,
+        )
+
+    def category(self, row):
+        return Category(id=int(row['id']), name=row['name'], slug=row['slug'])
+
+    def genre(self, row):
+        return Genre(id=int(row['id']), name=row['name'], slug=row['slug'])
+
+    def title(self, row):
+        return Title(
+            id=int(row['id']),
+            name=row['name'],
+            year=int(row['year']) if row.get('year') else None,
+            category_id=self.ref(Category, row.get('category')),
+            description=row.get('description') or '',
+        )
+
+    def genre_title(self, row):
+        title_id = self.ref(Title, row['title_id'])
+        genre_id = self.ref(Genre, row['genre_id'])
+        if title_id is None or genre_id is None:
+            return None
+        return GenreTitle(
+            id=int(row['id']), title_id=title_id, genre_id=genre_id
+        )
+
+    def review(self, row):
+        title_id = self.ref(Title, row['title_id'])
+        author_id = self.ref(User, row['author'])
+        if title_id is None or author_id is None:
+            return None
+        return Review(
+            id=int(row['id']),
+            title_id=title_id,
+            author_id=author_id,
+            text=row['text'],
+            score=int(row['score']),
+            pub_date=self.pub_date(row),
+        )
+
+    def comment(self, row):
+        review_id = self.ref(Review, row['review_id'])
+        author_id = self.ref(User, row['author'])
+        if review_id is None or author_id is None:
+            return None
+        return Comment(
+            id=int(row['id']),
+            review_id=review_id,
+            author_id=author_id,
+            text=row['text'],
+            pub_date=self.pub_date(row),
+        )
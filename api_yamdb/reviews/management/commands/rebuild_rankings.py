@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from reviews.rankings import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает таблицу рейтинга /titles/top/ со свежей средней '
+        'оценкой по всем отзывам.'
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_rankings()
+        self.stdout.write(self.style.SUCCESS(f'Строк в рейтинге: {rows}'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from reviews.rankings import rebuild_rankings
+from reviews.ratings import recalculate_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённый рейтинг произведений по отзывам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'title_ids', nargs='*', type=int,
+            help='id произведений; по умолчанию проверяются все.'
+        )
+
+    def handle(self, *args, **options):
+        repaired = recalculate_ratings(options['title_ids'] or None)
+        if repaired:
+            rebuild_rankings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено произведений: {repaired}')
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from reviews.stats import recalculate_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики оценок и комментариев произведений '
+        'с отзывами и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'title_ids', nargs='*', type=int,
+            help='id произведений; по умолчанию проверяются все.'
+        )
+
+    def handle(self, *args, **options):
+        repaired = recalculate_stats(options['title_ids'] or None)
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено произведений: {repaired}')
+        )
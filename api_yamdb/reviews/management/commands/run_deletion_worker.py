@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from reviews.deletion import process_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет скрытые произведения, категории и жанры вместе '
+        'с зависимыми строками пачками по диапазонам ключей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.DELETION_BATCH_SIZE,
+            help='Сколько строк обрабатывать в одной транзакции.'
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            default=settings.DELETION_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить все задания и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        try:
+            while True:
+                job = process_batch(options['batch_size'])
+                if job is not None:
+                    self.report(job)
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Остановлено.')
+
+    def report(self, job):
+        if job.finished:
+            self.stdout.write(self.style.SUCCESS(
+                f'{job}: удалено, обработано строк: {job.processed}'
+            ))
+        else:
+            self.stdout.write(
+                f'{job}: {job.step}, обработано строк: {job.processed}'
+            )
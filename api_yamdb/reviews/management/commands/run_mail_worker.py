@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from reviews.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками с повторными попытками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.MAIL_BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение.'
+        )
+        parser.add_argument(
+            '--max-attempts', type=int,
+            default=settings.MAIL_MAX_ATTEMPTS,
+            help='После скольких неудач письмо больше не отправляется.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.MAIL_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        try:
+            while True:
+                full_batch = self.process(options)
+                if options['once'] and not full_batch:
+                    break
+                if not full_batch:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Остановлено.')
+
+    def process(self, options):
+        """Отправляет пачку; True, если в очереди могут остаться письма."""
+        try:
+            sent, failed = send_batch(
+                options['batch_size'], options['max_attempts']
+            )
+        except Exception as error:
+            # Почтовый сервер недоступен: письма остаются в очереди.
+            self.stderr.write(f'Ошибка соединения: {error}')
+            return False
+        if sent or failed:
+            self.stdout.write(f'Отправлено: {sent}, с ошибкой: {failed}')
+        return sent + failed == options['batch_size']
@@ -1,10 +1,15 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import Avg
+from django.db import models, transaction
+from django.db.models import ExpressionWrapper, FloatField
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
 
 from .validators import max_value_current_year
 
+# Допустимые оценки отзыва.
+SCORES = range(1, 11)
+
 
 class User(AbstractUser):
     """Расширенная пользовательская модель."""
@@ -19,6 +24,40 @@ class User(AbstractUser):
     last_name = models.CharField(max_length=150, null=True, blank=True)
     bio = models.TextField(null=True, blank=True)
     role = models.CharField(max_length=150, choices=CHOICES, default='user')
+    token_version = models.PositiveIntegerField(
+        "Версия токенов",
+        default=0,
+        editable=False,
+        help_text="Растёт при смене прав; токены старой версии отклоняются",
+    )
+    # Поля, после изменения которых выданные токены отзываются.
+    TOKEN_FIELDS = ('role', 'is_superuser', 'is_staff', 'is_active')
+    # Сменилось ли имя при последнем save(); его видят сигналы.
+    renamed = False
+
+    def save(self, *args, **kwargs):
+        """Повышает token_version, если изменились права пользователя.
+
+        Изменения через QuerySet.update() токены не отзывают.
+        """
+        self.renamed = False
+        if self.pk is not None:
+            old = User.objects.filter(pk=self.pk).values(
+                'username', 'token_version', *self.TOKEN_FIELDS
+            ).first()
+            self.renamed = (
+                old is not None and old['username'] != self.username
+            )
+            if old is not None and any(
+                old[field] != getattr(self, field)
+                for field in self.TOKEN_FIELDS
+            ):
+                self.token_version = old['token_version'] + 1
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {
+                        *kwargs['update_fields'], 'token_version'
+                    }
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.username
@@ -29,6 +68,13 @@ class Code(models.Model):
     confirmation_code = models.CharField(max_length=150, null=True, blank=True)
 
 
+class VisibleQuerySet(models.QuerySet):
+
+    def visible(self):
+        """Без записей, скрытых до фонового удаления."""
+        return self.filter(is_hidden=False)
+
+
 class Category(models.Model):
     """Модель категорий произведений."""
     name = models.CharField(
@@ -41,6 +87,11 @@ class Category(models.Model):
         "URL",
         unique=True,
     )
+    is_hidden = models.BooleanField(
+        "Скрыто до удаления", default=False, editable=False
+    )
+
+    objects = VisibleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Категория"
@@ -63,6 +114,11 @@ class Genre(models.Model):
         "URL",
         unique=True,
     )
+    is_hidden = models.BooleanField(
+        "Скрыто до удаления", default=False, editable=False
+    )
+
+    objects = VisibleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Жанр"
@@ -73,6 +129,18 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(VisibleQuerySet):
+
+    def with_rating(self):
+        """Добавляет средний балл avg_score для сортировки и фильтрации."""
+        return self.annotate(
+            avg_score=ExpressionWrapper(
+                Cast('score_sum', FloatField()) / NullIf('reviews_count', 0),
+                output_field=FloatField(),
+            )
+        )
+
+
 class Title(models.Model):
     """Модель произведений."""
     name = models.CharField(
@@ -93,6 +161,8 @@ class Title(models.Model):
         null=True,
         verbose_name="Категория",
         related_name="title",
+        # Покрывается индексом title_category_year_idx.
+        db_index=False,
     )
     genre = models.ManyToManyField(
         Genre,
@@ -100,22 +170,60 @@ class Title(models.Model):
         through='GenreTitle'
     )
     description = models.TextField(blank=True, verbose_name='description')
+    reviews_count = models.PositiveIntegerField(
+        "Количество отзывов",
+        default=0,
+        editable=False,
+    )
+    score_sum = models.PositiveIntegerField(
+        "Сумма оценок",
+        default=0,
+        editable=False,
+    )
+    is_hidden = models.BooleanField(
+        "Скрыто до удаления", default=False, editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
         ordering = ["name"]
+        indexes = [
+            models.Index(
+                fields=['category', 'year'],
+                name='title_category_year_idx',
+            ),
+            models.Index(fields=['year'], name='title_year_idx'),
+        ]
+
+    @staticmethod
+    def calculate_rating(score_sum, reviews_count):
+        if reviews_count:
+            return float(f'{score_sum / reviews_count:.2f}')
+        return None
 
     @property
     def rating(self):
-        rating = self.reviews.aggregate(Avg('score'))['score__avg']
-        if rating:
-            return (
-                round(rating)
-                if isinstance(rating, int)
-                else float(f'{rating:.2f}')
-            )
-        return None
+        return self.calculate_rating(self.score_sum, self.reviews_count)
+
+    @property
+    def visible_genres(self):
+        """Жанры без скрытых до удаления.
+
+        Отбираются в Python, поэтому prefetch_related('genre') по-прежнему
+        загружает жанры страницы одним запросом.
+        """
+        return [genre for genre in self.genre.all() if not genre.is_hidden]
+
+    @property
+    def visible_category(self):
+        """Категория или None, если она скрыта до удаления."""
+        category = self.category
+        if category is None or category.is_hidden:
+            return None
+        return category
 
     def __str__(self):
         return self.name
@@ -131,12 +239,18 @@ class GenreTitle(models.Model):
     genre = models.ForeignKey(
         Genre,
         on_delete=models.CASCADE,
-        verbose_name="Жанр"
+        verbose_name="Жанр",
+        # Покрывается индексом genre_title_idx.
+        db_index=False,
     )
 
     class Meta:
         verbose_name = "Произведение и жанр"
         verbose_name_plural = "Произведения и жанры"
+        indexes = [
+            # Проверка EXISTS по жанру читает только индекс.
+            models.Index(fields=['genre', 'title'], name='genre_title_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title}, жанр - {self.genre}"
@@ -158,7 +272,9 @@ class Review(models.Model):
         related_name='reviews'
     )
     score = models.IntegerField(
-        validators=[MinValueValidator(1), MaxValueValidator(10)],
+        validators=[
+            MinValueValidator(SCORES[0]), MaxValueValidator(SCORES[-1])
+        ],
         verbose_name="Рейтинг произведений"
     )
     pub_date = models.DateTimeField(
@@ -173,10 +289,43 @@ class Review(models.Model):
                 name='unique_author_review'
             )
         ]
-        ordering = ("-pub_date",)
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx',
+            ),
+            models.Index(
+                fields=['pub_date', 'id'],
+                name='review_pub_date_idx',
+            ),
+        ]
+        ordering = ("-pub_date", "-id")
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзыв"
 
+    def lock_saved_rating(self):
+        """Блокирует строку отзыва и запоминает сохранённые в ней
+        произведение и оценку: сигналы поправят рейтинг на разницу.
+
+        Снимок, прочитанный при загрузке, мог устареть: параллельная
+        запись успела изменить отзыв, и разница посчиталась бы дважды.
+        """
+        if self.pk is None:
+            return
+        self.saved_rating = Review.objects.select_for_update().filter(
+            pk=self.pk
+        ).values_list('title_id', 'score').first() or (None, None)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            self.lock_saved_rating()
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self.lock_saved_rating()
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return self.text
 
@@ -204,7 +353,262 @@ class Comment(models.Model):
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
-        ordering = ["pub_date"]
+        ordering = ["pub_date", "id"]
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем сохранённый отзыв, чтобы при переносе комментария
+        # поправить счётчики обоих произведений.
+        instance.saved_review_id = instance.__dict__.get('review_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return self.text
+
+
+class TitleRanking(models.Model):
+    """Строка таблицы лучших произведений.
+
+    У каждого произведения с отзывами есть общая строка без жанра и по
+    строке на каждый жанр, поэтому выборка по категории и жанру идёт
+    по индексу в порядке score.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name="Произведение",
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        db_index=False,
+        related_name='+',
+        verbose_name="Категория",
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        db_index=False,
+        related_name='+',
+        verbose_name="Жанр",
+    )
+    score = models.FloatField("Байесовская оценка")
+
+    class Meta:
+        verbose_name = "Место в рейтинге"
+        verbose_name_plural = "Рейтинг произведений"
+        indexes = [
+            models.Index(
+                fields=['genre', '-score'],
+                name='ranking_genre_score_idx',
+            ),
+            models.Index(
+                fields=['category', 'genre', '-score'],
+                name='ranking_category_score_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score:.2f}'
+
+
+class RankingPrior(models.Model):
+    """Средняя оценка, с которой строилась таблица рейтинга.
+
+    Одна строка на всю базу, её перезаписывает rebuild_rankings.
+    """
+    mean = models.FloatField("Средняя оценка")
+
+    class Meta:
+        verbose_name = "Среднее для рейтинга"
+        verbose_name_plural = "Среднее для рейтинга"
+
+    def __str__(self):
+        return f'{self.mean:.2f}'
+
+
+class SimilarTitle(models.Model):
+    """Сосед произведения из таблицы похожих, которую строит
+    команда build_similar_titles."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='similar_links',
+        db_index=False,
+        verbose_name="Произведение",
+    )
+    similar = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Похожее произведение",
+    )
+    score = models.FloatField("Сходство")
+
+    class Meta:
+        verbose_name = "Похожее произведение"
+        verbose_name_plural = "Похожие произведения"
+        indexes = [
+            models.Index(
+                fields=['title', '-score'],
+                name='similar_title_score_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id} → {self.similar_id}: {self.score:.2f}'
+
+
+class TitleStats(models.Model):
+    """Счётчики отзывов по оценкам и комментариев к произведению.
+
+    Обновляются сигналами в транзакции изменения отзыва или
+    комментария, сверяются командой recalculate_stats.
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name="Произведение",
+    )
+    score_1 = models.PositiveIntegerField("Оценок 1", default=0)
+    score_2 = models.PositiveIntegerField("Оценок 2", default=0)
+    score_3 = models.PositiveIntegerField("Оценок 3", default=0)
+    score_4 = models.PositiveIntegerField("Оценок 4", default=0)
+    score_5 = models.PositiveIntegerField("Оценок 5", default=0)
+    score_6 = models.PositiveIntegerField("Оценок 6", default=0)
+    score_7 = models.PositiveIntegerField("Оценок 7", default=0)
+    score_8 = models.PositiveIntegerField("Оценок 8", default=0)
+    score_9 = models.PositiveIntegerField("Оценок 9", default=0)
+    score_10 = models.PositiveIntegerField("Оценок 10", default=0)
+    comments_count = models.PositiveIntegerField(
+        "Комментариев", default=0
+    )
+
+    class Meta:
+        verbose_name = "Статистика произведения"
+        verbose_name_plural = "Статистика произведений"
+
+    @staticmethod
+    def score_field(score):
+        return f'score_{score}'
+
+    @property
+    def scores(self):
+        """Число отзывов с каждой оценкой."""
+        return {
+            score: getattr(self, self.score_field(score)) for score in SCORES
+        }
+
+    @property
+    def reviews_count(self):
+        return sum(self.scores.values())
+
+    @property
+    def rating(self):
+        return Title.calculate_rating(
+            sum(score * count for score, count in self.scores.items()),
+            self.reviews_count,
+        )
+
+    def __str__(self):
+        return f'{self.title_id}: {self.reviews_count}'
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку фоновым обработчиком."""
+    subject = models.CharField("Тема", max_length=255)
+    body = models.TextField("Текст")
+    from_email = models.CharField("Отправитель", max_length=254)
+    to = models.EmailField("Получатель", max_length=254)
+    created = models.DateTimeField("Создано", auto_now_add=True)
+    send_after = models.DateTimeField("Отправить после", default=timezone.now)
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    sent_at = models.DateTimeField("Отправлено", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+        ordering = ["send_after", "id"]
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'send_after'],
+                name='outgoing_email_queue_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
+
+
+class DeletionJob(models.Model):
+    """Задание на фоновое удаление скрытой записи с зависимыми строками.
+
+    step и last_pk — шаг удаления и последний обработанный первичный
+    ключ, с которых продолжается работа после каждой пачки.
+    """
+    MODELS = (
+        ('title', 'title'),
+        ('category', 'category'),
+        ('genre', 'genre'),
+    )
+    model = models.CharField("Модель", max_length=20, choices=MODELS)
+    object_id = models.PositiveIntegerField("id записи")
+    object_repr = models.CharField("Запись", max_length=200)
+    created = models.DateTimeField("Создано", auto_now_add=True)
+    step = models.CharField("Шаг", max_length=50, blank=True)
+    last_pk = models.BigIntegerField("Последний ключ", default=0)
+    processed = models.PositiveIntegerField("Обработано строк", default=0)
+    finished = models.DateTimeField("Завершено", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Фоновое удаление"
+        verbose_name_plural = "Фоновые удаления"
+        ordering = ["created", "id"]
+        indexes = [
+            models.Index(
+                fields=['finished', 'created'],
+                name='deletion_job_queue_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}: {self.object_repr}'
+
+
+class ResourceChange(models.Model):
+    """Время последней правки или удаления в ресурсе API.
+
+    По нему меняются ETag и Last-Modified списков, которые нельзя
+    вычислить по самим строкам: правки не сдвигают pub_date, а ответ
+    показывает поля родителя и авторов.
+    """
+    resource = models.CharField("Ресурс", max_length=100, primary_key=True)
+    changed = models.DateTimeField("Изменено")
+
+    class Meta:
+        verbose_name = "Изменение ресурса"
+        verbose_name_plural = "Изменения ресурсов"
+
+    def __str__(self):
+        return f'{self.resource}: {self.changed}'
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+MAX_BACKOFF = 60 * 60
+
+
+def enqueue_email(subject, body, from_email, to):
+    """Ставит письмо в очередь вместо отправки в рамках запроса."""
+    return OutgoingEmail.objects.create(
+        subject=subject, body=body, from_email=from_email, to=to
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return timedelta(seconds=min(
+        settings.MAIL_RETRY_BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF
+    ))
+
+
+def pending_emails(max_attempts):
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        send_after__lte=timezone.now(),
+        attempts__lt=max_attempts,
+    )
+
+
+def claim_batch(batch_size, max_attempts):
+    """Забирает пачку писем в короткой транзакции.
+
+    Попытка засчитывается сразу, а следующая откладывается на
+    MAIL_CLAIM_TIMEOUT: другие обработчики не возьмут эти письма,
+    а если обработчик упадёт во время отправки, они вернутся в очередь.
+    """
+    lease = timezone.now() + timedelta(seconds=settings.MAIL_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        batch = list(
+            pending_emails(max_attempts)
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in batch]
+        ).update(attempts=F('attempts') + 1, send_after=lease)
+    for email in batch:
+        email.attempts += 1
+    return batch
+
+
+def release_batch(batch):
+    """Возвращает письма в очередь, не засчитывая попытку."""
+    OutgoingEmail.objects.filter(
+        pk__in=[email.pk for email in batch]
+    ).update(attempts=F('attempts') - 1, send_after=timezone.now())
+
+
+def send_email(email, connection):
+    """Отправляет письмо и отмечает результат; True, если отправлено."""
+    try:
+        EmailMessage(
+            email.subject, email.body, email.from_email,
+            [email.to], connection=connection,
+        ).send()
+    except Exception as error:
+        email.last_error = str(error)
+        email.send_after = timezone.now() + retry_delay(email.attempts)
+        email.save(update_fields=('last_error', 'send_after'))
+        return False
+    email.sent_at = timezone.now()
+    email.save(update_fields=('sent_at',))
+    return True
+
+
+def send_batch(batch_size, max_attempts):
+    """Отправляет пачку писем через одно соединение с почтовым сервером.
+
+    Блокировки строк держатся только пока письма забираются: почтовый
+    сервер ждут вне транзакции. Если соединиться не удалось, письма
+    возвращаются в очередь и ошибка пробрасывается. Возвращает число
+    отправленных и число неудачных писем.
+    """
+    batch = claim_batch(batch_size, max_attempts)
+    if not batch:
+        return 0, 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception:
+        release_batch(batch)
+        raise
+    try:
+        sent = sum(send_email(email, connection) for email in batch)
+    finally:
+        connection.close()
+    return sent, len(batch) - sent
@@ -0,0 +1,102 @@
+import json
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    """Оценка числа строк по статистике планировщика PostgreSQL.
+
+    Для выборки без условий берётся reltuples таблицы, для остальных —
+    оценка строк из EXPLAIN. На других СУБД возвращает None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    query = queryset.query
+    with connection.cursor() as cursor:
+        if not query.where and not query.distinct:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            # До первого ANALYZE reltuples равен 0 или -1.
+            return int(row[0]) if row and row[0] > 0 else None
+        sql, params = (
+            queryset.order_by().query.get_compiler(queryset.db).as_sql()
+        )
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    # psycopg2 сам разбирает json, другие драйверы отдают строку.
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ApproximatePage(Page):
+    """Страница, о следующей странице которой известно по лишней строке."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self.next_exists = has_next
+
+    def has_next(self):
+        return self.next_exists
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator без точного COUNT(*) на больших таблицах.
+
+    Если оценка планировщика не меньше APPROXIMATE_COUNT_THRESHOLD,
+    count берётся из неё и approximate становится True. Оценка может
+    разойтись с числом строк, поэтому номер страницы не ограничивается
+    ею, а наличие следующей страницы определяется по лишней строке.
+    """
+
+    @cached_property
+    def estimate(self):
+        if not isinstance(self.object_list, QuerySet):
+            return None
+        return estimate_count(self.object_list)
+
+    @cached_property
+    def approximate(self):
+        return (
+            self.estimate is not None
+            and self.estimate >= settings.APPROXIMATE_COUNT_THRESHOLD
+        )
+
+    @cached_property
+    def count(self):
+        if self.approximate:
+            return self.estimate
+        return super().count
+
+    def validate_number(self, number):
+        if not self.approximate:
+            return super().validate_number(number)
+        # Верхняя граница по оценке не проверяется: строк может быть больше.
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть целым числом.')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1.')
+        return number
+
+    def page(self, number):
+        if not self.approximate:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На странице нет записей.')
+        return ApproximatePage(
+            rows[:self.per_page], number, self,
+            has_next=len(rows) > self.per_page,
+        )
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from .db import bulk_insert
+from .models import GenreTitle, RankingPrior, Title, TitleRanking
+
+PRIOR_PK = 1
+
+
+def calculate_prior_mean():
+    """Средняя оценка по всем отзывам — к ней тянутся редкие оценки.
+
+    None, если отзывов ещё нет.
+    """
+    totals = Title.objects.aggregate(
+        score_sum=Sum('score_sum'), reviews_count=Sum('reviews_count')
+    )
+    if not totals['reviews_count']:
+        return None
+    return totals['score_sum'] / totals['reviews_count']
+
+
+def save_prior_mean(mean):
+    if mean is None:
+        RankingPrior.objects.filter(pk=PRIOR_PK).delete()
+    else:
+        RankingPrior.objects.update_or_create(
+            pk=PRIOR_PK, defaults={'mean': mean}
+        )
+
+
+def get_prior_mean():
+    """Среднее, с которым строилась таблица; хранится в БД до пересборки.
+
+    Пока отзывов нет, среднее не сохраняется: его задаст первый отзыв.
+    """
+    mean = RankingPrior.objects.filter(pk=PRIOR_PK).values_list(
+        'mean', flat=True
+    ).first()
+    if mean is None:
+        mean = calculate_prior_mean()
+        if mean is None:
+            return 0.0
+        save_prior_mean(mean)
+    return mean
+
+
+def bayesian_score(score_sum, reviews_count, mean):
+    """Средняя оценка с C = TOP_PRIOR_WEIGHT воображаемыми отзывами
+    со средней оценкой mean."""
+    weight = settings.TOP_PRIOR_WEIGHT
+    return (weight * mean + score_sum) / (weight + reviews_count)
+
+
+def ranking_rows(titles, links, mean):
+    """Строки TitleRanking для произведений с отзывами.
+
+    links — записи GenreTitle, из которых берутся жанры.
+    """
+    genres = {}
+    for title_id, genre_id in links.values_list('title_id', 'genre_id'):
+        genres.setdefault(title_id, set()).add(genre_id)
+    for title_id, category_id, score_sum, reviews_count in (
+        titles.filter(reviews_count__gt=0).values_list(
+            'pk', 'category_id', 'score_sum', 'reviews_count'
+        ).iterator()
+    ):
+        score = bayesian_score(score_sum, reviews_count, mean)
+        for genre_id in [None, *genres.get(title_id, ())]:
+            yield TitleRanking(
+                title_id=title_id,
+                category_id=category_id,
+                genre_id=genre_id,
+                score=score,
+            )
+
+
+def refresh_rankings(title_ids):
+    """Пересчитывает строки рейтинга у изменившихся произведений."""
+    title_ids = list(title_ids)
+    with transaction.atomic():
+        TitleRanking.objects.filter(title_id__in=title_ids).delete()
+        bulk_insert(TitleRanking, ranking_rows(
+            Title.objects.filter(pk__in=title_ids),
+            GenreTitle.objects.filter(title_id__in=title_ids),
+            get_prior_mean(),
+        ))
+
+
+def rebuild_rankings():
+    """Строит таблицу заново со свежим средним; возвращает число строк."""
+    mean = calculate_prior_mean()
+    with transaction.atomic():
+        TitleRanking.objects.all().delete()
+        rows = list(ranking_rows(
+            Title.objects.all(), GenreTitle.objects.all(), mean
+        ))
+        bulk_insert(TitleRanking, rows)
+        save_prior_mean(mean)
+    return len(rows)
@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Review, Title
+
+
+def change_title_rating(title_id, count_delta, score_delta):
+    """Атомарно сдвигает счётчики рейтинга произведения."""
+    Title.objects.filter(pk=title_id).update(
+        reviews_count=F('reviews_count') + count_delta,
+        score_sum=F('score_sum') + score_delta,
+    )
+
+
+def actual_rating_fields():
+    """Подзапросы с фактическим числом отзывов и суммой оценок."""
+    reviews = (
+        Review.objects.filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+    )
+    return {
+        'actual_count': Coalesce(
+            Subquery(reviews.annotate(count=Count('pk')).values('count')), 0
+        ),
+        'actual_sum': Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')), 0
+        ),
+    }
+
+
+def recalculate_ratings(title_ids=None):
+    """Пересчитывает рейтинг у произведений, где счётчики разошлись.
+
+    Нужен после bulk_create, queryset.update и loaddata,
+    которые не отправляют сигналы. Возвращает число исправленных
+    произведений.
+    """
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    fields = actual_rating_fields()
+    with transaction.atomic():
+        broken = list(
+            titles.annotate(**fields)
+            .exclude(
+                reviews_count=F('actual_count'),
+                score_sum=F('actual_sum'),
+            )
+            .values_list('pk', flat=True)
+        )
+        if broken:
+            Title.objects.filter(pk__in=broken).update(
+                reviews_count=fields['actual_count'],
+                score_sum=fields['actual_sum'],
+            )
+    return len(broken)
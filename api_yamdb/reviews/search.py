@@ -0,0 +1,103 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from .models import Title
+
+SEARCH_CONFIG = 'russian'
+
+SEARCH_INDEX = 'reviews_title_search_vector_idx'
+TRIGRAM_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS reviews_title_name_trgm_idx '
+    'ON reviews_title USING gin (name gin_trgm_ops)'
+)
+
+
+def search_vector():
+    """Документ поиска: название с весом A и описание с весом B.
+
+    Собран из выражений, а не из SQL с именем таблицы: в подзапросах
+    Django переименовывает таблицу, например в U0.
+    """
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def search_index_sql(connection):
+    """CREATE INDEX по тому же выражению, что строит search_vector().
+
+    PostgreSQL подбирает функциональный индекс, только если выражение
+    в запросе совпадает с индексным. Возвращает SQL и параметры.
+    """
+    query = Title.objects.all().query
+    compiler = query.get_compiler(connection=connection)
+    sql, params = search_vector().resolve_expression(query).as_sql(
+        compiler, connection
+    )
+    table = connection.ops.quote_name(Title._meta.db_table)
+    return (
+        f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} ON {table} '
+        f'USING gin (({sql.replace(f"{table}.", "")}))'
+    ), params
+
+
+def is_postgresql(using):
+    return connections[using].vendor == 'postgresql'
+
+
+def create_search_indexes(using='default', **kwargs):
+    """Создаёт индексы поиска после migrate; на других СУБД ничего не делает.
+
+    Функциональные индексы Django 2.2 описать в Meta.indexes не умеет,
+    а GIN-индексы не создаются на SQLite, поэтому они заводятся здесь.
+    Индекс по прежнему SQL-выражению удаляется: запросы его не используют.
+    """
+    if not is_postgresql(using):
+        return
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cursor.execute('DROP INDEX IF EXISTS reviews_title_search_idx')
+        cursor.execute(*search_index_sql(connection))
+        cursor.execute(TRIGRAM_INDEX_SQL)
+
+
+def search_titles(queryset, text):
+    """Отбирает произведения по запросу и сортирует по релевантности.
+
+    На PostgreSQL — полнотекстовый поиск по названию и описанию
+    и триграммы по названию для запросов с опечатками; на остальных
+    СУБД — поиск подстроки, совпадения в названии идут первыми.
+    """
+    if is_postgresql(queryset.db):
+        return postgresql_search(queryset, text)
+    return substring_search(queryset, text)
+
+
+def postgresql_search(queryset, text):
+    vector = search_vector()
+    query = SearchQuery(text, config=SEARCH_CONFIG)
+    return queryset.annotate(
+        search_document=vector,
+        search_rank=SearchRank(vector, query),
+        similarity=TrigramSimilarity('name', text),
+    ).filter(
+        Q(search_document=query) | Q(name__trigram_similar=text)
+    ).order_by(
+        (F('search_rank') + F('similarity')).desc(), 'pk'
+    )
+
+
+def substring_search(queryset, text):
+    return queryset.filter(
+        Q(name__icontains=text) | Q(description__icontains=text)
+    ).annotate(
+        search_rank=Case(
+            When(name__icontains=text, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+    ).order_by('-search_rank', 'name', 'pk')
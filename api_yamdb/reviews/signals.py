@@ -0,0 +1,102 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Comment, Review, Title, TitleStats
+from .rankings import refresh_rankings
+from .ratings import change_title_rating, recalculate_ratings
+from .stats import (change_comments_count, change_score_count,
+                    change_title_stats, recalculate_stats)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    saved_title_id, saved_score = getattr(
+        instance, 'saved_rating', (None, None)
+    )
+    if created:
+        change_title_rating(instance.title_id, 1, instance.score)
+        change_score_count(instance.title_id, instance.score, 1)
+    elif saved_title_id is None or saved_score is None:
+        recalculate_ratings([instance.title_id])
+        recalculate_stats([instance.title_id])
+    elif saved_title_id != instance.title_id:
+        change_title_rating(saved_title_id, -1, -saved_score)
+        change_title_rating(instance.title_id, 1, instance.score)
+        move_review_stats(instance, saved_title_id, saved_score)
+    elif saved_score != instance.score:
+        change_title_rating(
+            instance.title_id, 0, instance.score - saved_score
+        )
+        change_score_count(instance.title_id, saved_score, -1)
+        change_score_count(instance.title_id, instance.score, 1)
+    else:
+        return
+    refresh_rankings({instance.title_id, saved_title_id} - {None})
+    instance.saved_rating = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    title_id, score = getattr(
+        instance, 'saved_rating', (instance.title_id, instance.score)
+    )
+    if title_id is None or score is None:
+        recalculate_ratings([instance.title_id])
+        recalculate_stats([instance.title_id])
+    else:
+        change_title_rating(title_id, -1, -score)
+        change_score_count(title_id, score, -1)
+    refresh_rankings([title_id or instance.title_id])
+
+
+def move_review_stats(review, saved_title_id, saved_score):
+    """Переносит оценку и комментарии отзыва на другое произведение."""
+    comments = review.comments.count()
+    change_title_stats(saved_title_id, **{
+        TitleStats.score_field(saved_score): -1, 'comments_count': -comments
+    })
+    change_title_stats(review.title_id, **{
+        TitleStats.score_field(review.score): 1, 'comments_count': comments
+    })
+
+
+@receiver(post_save, sender=Comment)
+def update_stats_on_comment_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    saved_review_id = getattr(instance, 'saved_review_id', None)
+    if created:
+        change_comments_count(instance.review_id, 1)
+    elif saved_review_id is None:
+        recalculate_stats([instance.review.title_id])
+    elif saved_review_id != instance.review_id:
+        change_comments_count(saved_review_id, -1)
+        change_comments_count(instance.review_id, 1)
+    instance.saved_review_id = instance.review_id
+
+
+@receiver(post_delete, sender=Comment)
+def update_stats_on_comment_delete(sender, instance, **kwargs):
+    change_comments_count(
+        getattr(instance, 'saved_review_id', None) or instance.review_id, -1
+    )
+
+
+@receiver(post_save, sender=Title)
+def update_rankings_on_title_save(sender, instance, created, raw, **kwargs):
+    # У нового произведения нет отзывов, в рейтинг оно не попадает.
+    if not raw and not created:
+        refresh_rankings([instance.pk])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_rankings_on_genre_change(sender, instance, action, reverse,
+                                    pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        refresh_rankings([instance.pk])
+    elif pk_set:
+        refresh_rankings(pk_set)
@@ -0,0 +1,174 @@
+"""Таблица похожих произведений для /titles/{id}/similar/.
+
+Сходство — взвешенная сумма двух косинусных мер: по общим жанрам и по
+общим рецензентам. Матрицы «произведение × жанр» и «произведение ×
+автор отзыва» строятся разреженными, а сходство считается пачками
+строк: из плотного блока «пачка × все произведения» сразу берутся
+K лучших соседей, поэтому память ограничена размером пачки, а не
+квадратом числа произведений. Пачки можно считать в нескольких
+процессах.
+"""
+import itertools
+import multiprocessing
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from .db import bulk_insert
+from .models import GenreTitle, Review, SimilarTitle, Title
+
+# Строк из базы за одно чтение курсора при загрузке пар.
+FETCH_SIZE = 10000
+
+# Модель в процессе-обработчике, задаётся init_worker.
+worker_model = None
+
+
+def load_pairs(queryset, *fields):
+    """Пары id из базы массивом numpy формы (n, 2)."""
+    values = queryset.values_list(*fields).iterator(chunk_size=FETCH_SIZE)
+    flat = np.fromiter(itertools.chain.from_iterable(values), dtype=np.int64)
+    return flat.reshape(-1, 2)
+
+
+def normalized_incidence(rows, columns, shape):
+    """Матрица 0/1 «произведение × признак» с единичными строками.
+
+    Скалярное произведение таких строк — косинусное сходство.
+    """
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)), shape=shape
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    counts = np.diff(matrix.indptr)
+    scale = np.zeros(shape[0], dtype=np.float32)
+    scale[counts > 0] = 1 / np.sqrt(counts[counts > 0])
+    return sparse.diags(scale) @ matrix
+
+
+class SimilarityModel:
+    """Разреженные матрицы признаков и id произведений по строкам."""
+
+    def __init__(self, title_ids, genres, reviewers):
+        self.title_ids = title_ids
+        self.genres = genres.tocsr()
+        # Жанров немного, поэтому транспонированная матрица хранится
+        # плотной: произведение на неё сразу даёт плотный блок.
+        self.genres_t = genres.T.toarray()
+        self.reviewers = reviewers.tocsr()
+        self.reviewers_t = reviewers.T.tocsc()
+
+    @classmethod
+    def load(cls):
+        title_ids = np.fromiter(
+            Title.objects.order_by('pk').values_list('pk', flat=True)
+            .iterator(chunk_size=FETCH_SIZE),
+            dtype=np.int64,
+        )
+        return cls(
+            title_ids,
+            cls.feature_matrix(
+                title_ids, load_pairs(GenreTitle.objects, 'title', 'genre')
+            ),
+            cls.feature_matrix(
+                title_ids, load_pairs(Review.objects, 'title', 'author')
+            ),
+        )
+
+    @staticmethod
+    def feature_matrix(title_ids, pairs):
+        features, columns = np.unique(pairs[:, 1], return_inverse=True)
+        return normalized_incidence(
+            np.searchsorted(title_ids, pairs[:, 0]),
+            columns.ravel(),
+            (len(title_ids), len(features)),
+        )
+
+    def __len__(self):
+        return len(self.title_ids)
+
+    def similarity_block(self, start, stop):
+        """Плотный блок сходства строк start..stop со всеми строками."""
+        block = (
+            self.genres[start:stop] @ self.genres_t
+        ) * settings.SIMILAR_GENRE_WEIGHT
+        common = (self.reviewers[start:stop] @ self.reviewers_t).tocoo()
+        block[common.row, common.col] += (
+            settings.SIMILAR_REVIEWER_WEIGHT * common.data
+        )
+        block[np.arange(stop - start), np.arange(start, stop)] = 0
+        return block
+
+    def neighbours(self, start, stop, top_k):
+        """K лучших соседей строк start..stop.
+
+        Возвращает массивы id произведений, id соседей и сходства;
+        соседи с нулевым сходством отбрасываются.
+        """
+        top_k = min(top_k, len(self) - 1)
+        if top_k < 1:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.float32)
+        block = self.similarity_block(start, stop)
+        columns = np.argpartition(-block, top_k - 1, axis=1)[:, :top_k]
+        scores = np.take_along_axis(block, columns, axis=1)
+        order = np.argsort(-scores, axis=1, kind='stable')
+        columns = np.take_along_axis(columns, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        rows = np.repeat(np.arange(start, stop), top_k)
+        found = scores.ravel() > 0
+        return (
+            self.title_ids[rows[found]],
+            self.title_ids[columns.ravel()[found]],
+            scores.ravel()[found],
+        )
+
+
+def init_worker(model):
+    global worker_model
+    worker_model = model
+
+
+def worker_neighbours(task):
+    return worker_model.neighbours(*task)
+
+
+def compute_neighbours(model, top_k, chunk_size, workers):
+    """Соседи по пачкам строк, в текущем процессе или в пуле."""
+    tasks = [
+        (start, min(start + chunk_size, len(model)), top_k)
+        for start in range(0, len(model), chunk_size)
+    ]
+    if workers <= 1:
+        return [model.neighbours(*task) for task in tasks]
+    # Обработчики только считают матрицы и не обращаются к базе.
+    with multiprocessing.Pool(
+        workers, initializer=init_worker, initargs=(model,)
+    ) as pool:
+        return pool.map(worker_neighbours, tasks)
+
+
+def build_similar_titles(top_k=None, chunk_size=None, workers=1):
+    """Пересобирает таблицу SimilarTitle; возвращает число строк."""
+    top_k = top_k or settings.SIMILAR_TOP_K
+    chunk_size = chunk_size or settings.SIMILAR_CHUNK_SIZE
+    model = SimilarityModel.load()
+    # Транзакция держится только на время записи готовых соседей.
+    results = compute_neighbours(model, top_k, chunk_size, workers)
+    total = 0
+    with transaction.atomic():
+        SimilarTitle.objects.all().delete()
+        for title_ids, similar_ids, scores in results:
+            bulk_insert(SimilarTitle, (
+                SimilarTitle(
+                    title_id=title_id, similar_id=similar_id, score=score
+                )
+                for title_id, similar_id, score in zip(
+                    title_ids.tolist(), similar_ids.tolist(), scores.tolist()
+                )
+            ))
+            total += len(title_ids)
+    return total
@@ -0,0 +1,50 @@
+from django.db import connections
+from django.db.models.functions import Upper
+
+from .models import Category, Genre
+
+SLUG_MODELS = (Category, Genre)
+
+
+def slug_key():
+    """Слаг без учёта регистра: по этому выражению ищут и индексируют."""
+    return Upper('slug')
+
+
+def find_slugs(queryset, slugs):
+    """Отбирает записи по слагам без учёта регистра одним IN.
+
+    slug__iexact дал бы UPPER("slug"::text) в цепочке OR на каждый
+    слаг; сравнение выражения slug_key() со списком попадает
+    в индекс по тому же выражению.
+    """
+    return queryset.annotate(slug_key=slug_key()).filter(
+        slug_key__in={slug.upper() for slug in slugs}
+    )
+
+
+def slug_index_sql(model, connection):
+    """CREATE INDEX по выражению slug_key() для таблицы модели."""
+    query = model.objects.all().query
+    compiler = query.get_compiler(connection=connection)
+    sql, params = slug_key().resolve_expression(query).as_sql(
+        compiler, connection
+    )
+    table = connection.ops.quote_name(model._meta.db_table)
+    return (
+        f'CREATE INDEX IF NOT EXISTS {model._meta.db_table}_slug_upper_idx '
+        f'ON {table} (({sql.replace(f"{table}.", "")}))'
+    ), params
+
+
+def create_slug_indexes(using='default', **kwargs):
+    """Создаёт индексы по slug_key() после migrate только на PostgreSQL.
+
+    Функциональные индексы Django 2.2 описать в Meta.indexes не умеет.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for model in SLUG_MODELS:
+            cursor.execute(*slug_index_sql(model, connection))
@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .db import BATCH_SIZE, bulk_insert
+from .models import SCORES, Comment, Review, TitleStats
+
+STATS_FIELDS = [TitleStats.score_field(score) for score in SCORES] + [
+    'comments_count'
+]
+
+
+def change_title_stats(title_id, **deltas):
+    """Атомарно сдвигает счётчики статистики произведения.
+
+    Строка создаётся при первом увеличении счётчика; уменьшение
+    без строки пропускается — такие расхождения исправляет
+    recalculate_stats.
+    """
+    changes = {
+        field: F(field) + delta for field, delta in deltas.items() if delta
+    }
+    if not changes:
+        return
+    stats = TitleStats.objects.filter(title_id=title_id)
+    if stats.update(**changes) or max(deltas.values()) <= 0:
+        return
+    TitleStats.objects.bulk_create(
+        [TitleStats(title_id=title_id)], ignore_conflicts=True
+    )
+    stats.update(**changes)
+
+
+def change_score_count(title_id, score, delta):
+    change_title_stats(title_id, **{TitleStats.score_field(score): delta})
+
+
+def change_comments_count(review_id, delta):
+    """Сдвигает число комментариев у произведения отзыва review_id."""
+    TitleStats.objects.filter(title__reviews=review_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+def actual_stats(title_ids=None):
+    """Фактические счётчики по отзывам и комментариям, по id произведения."""
+    reviews = Review.objects.order_by().values('title')
+    comments = Comment.objects.order_by().values('review__title')
+    if title_ids is not None:
+        reviews = reviews.filter(title__in=title_ids)
+        comments = comments.filter(review__title__in=title_ids)
+    stats = {}
+    for row in reviews.annotate(**{
+        TitleStats.score_field(score): Count('pk', filter=Q(score=score))
+        for score in SCORES
+    }):
+        title_id = row.pop('title')
+        stats[title_id] = dict(row, comments_count=0)
+    for title_id, count in comments.annotate(
+        count=Count('pk')
+    ).values_list('review__title', 'count'):
+        stats.setdefault(title_id, dict.fromkeys(STATS_FIELDS, 0))
+        stats[title_id]['comments_count'] = count
+    return stats
+
+
+def recalculate_stats(title_ids=None):
+    """Исправляет статистику произведений, где счётчики разошлись.
+
+    Нужен после bulk_create, queryset.update и loaddata, которые не
+    отправляют сигналы. Возвращает число исправленных произведений.
+    """
+    stored = TitleStats.objects.all()
+    if title_ids is not None:
+        stored = stored.filter(title__in=title_ids)
+    with transaction.atomic():
+        stored = {stats.pk: stats for stats in stored.select_for_update()}
+        actual = actual_stats(title_ids)
+        created, updated = [], []
+        for title_id in set(stored) | set(actual):
+            values = actual.get(title_id, dict.fromkeys(STATS_FIELDS, 0))
+            stats = stored.get(title_id)
+            if stats is None:
+                created.append(TitleStats(title_id=title_id, **values))
+            elif any(getattr(stats, f) != v for f, v in values.items()):
+                for field, value in values.items():
+                    setattr(stats, field, value)
+                updated.append(stats)
+        bulk_insert(TitleStats, created)
+        TitleStats.objects.bulk_update(
+            updated, STATS_FIELDS, batch_size=BATCH_SIZE
+        )
+    return len(created) + len(updated)
@@ -1,9 +1,96 @@
+import os
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings():
+    """Без сервера PostgreSQL тесты с базой идут на SQLite в памяти."""
+    from django.conf import settings
+    from django.db import connections
+
+    if not os.getenv('DB_HOST'):
+        connections.databases = {'default': {
+            **settings.DATABASES['default'],
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }}
+        del connections['default']
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш в памяти переживает откат базы; каждый тест начинает с пустого."""
+    from django.core.cache import caches
+
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def api_admin_client():
+    """APIClient с токеном администратора API (роль admin)."""
+    from api.authentication import get_access_token
+    from rest_framework.test import APIClient
+    from reviews.models import User
+
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.ru', role='admin'
+    )
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(admin)}')
+    return client
+
+
+@pytest.fixture
+def authors():
+    """Три пользователя для отзывов и комментариев."""
+    from reviews.models import User
+
+    return [
+        User.objects.create(username=f'u{number}', email=f'u{number}@ya.ru')
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def book():
+    from reviews.models import Category
+
+    return Category.objects.create(name='Книга', slug='book')
+
+
+@pytest.fixture
+def make_titles(book):
+    """Фабрика произведений: по одному на каждое переданное название.
+
+    По умолчанию произведения 2000 года в категории «Книга»; остальные
+    поля передаются именованными аргументами.
+    """
+    from reviews.models import Title
+
+    def make_titles(*names, **fields):
+        fields = {'year': 2000, 'category': book, **fields}
+        return [Title.objects.create(name=name, **fields) for name in names]
+    return make_titles
+
+
+@pytest.fixture
+def postgresql():
+    """Подключение PostgreSQL только для компиляции SQL, без сервера."""
+    from django.db import connection
+    from django.db.utils import load_backend
+
+    backend = load_backend('django.db.backends.postgresql')
+    return backend.DatabaseWrapper(dict(
+        connection.settings_dict, ENGINE='django.db.backends.postgresql'
+    ), 'postgresql')
@@ -0,0 +1,81 @@
+import pytest
+from api.authentication import get_access_token, state_key
+from api.cache import get_cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import User
+
+
+@pytest.fixture
+def admin():
+    return User.objects.create(
+        username='admin', email='admin@yamdb.ru', role='admin'
+    )
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}')
+    return client
+
+
+def evict(user):
+    """Как будто запрос пришёл в другой процесс с пустым кэшем."""
+    get_cache().delete(state_key(user.pk))
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def test_safe_requests_reuse_cached_state(self, admin):
+        client = client_for(admin)
+        assert client.get('/api/v1/users/').status_code == 200
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get('/api/v1/users/').status_code == 200
+        assert not any(
+            query['sql'].startswith(
+                'SELECT "reviews_user"."username", "reviews_user"."role"'
+            )
+            for query in queries.captured_queries
+        ), 'Проверьте, что GET не читает пользователя из БД повторно'
+
+    @pytest.mark.parametrize('cached', [True, False])
+    def test_demoted_admin_token_is_revoked(self, admin, cached):
+        client = client_for(admin)
+        assert client.get('/api/v1/users/').status_code == 200
+        admin.role = 'user'
+        admin.save()
+        if not cached:
+            evict(admin)
+        assert client.get('/api/v1/users/').status_code == 401
+        assert client.get('/api/v1/export/titles/').status_code == 401
+        assert client.post(
+            '/api/v1/users/', {'username': 'new', 'email': 'new@yamdb.ru'}
+        ).status_code == 401
+        # Новый токен действует, но прав администратора в нём уже нет.
+        assert client_for(admin).get('/api/v1/users/').status_code == 403
+
+    def test_unrelated_changes_keep_tokens(self, admin):
+        client = client_for(admin)
+        admin.bio = 'О себе'
+        admin.save()
+        evict(admin)
+        assert client.get('/api/v1/users/').status_code == 200
+
+    def test_deleted_user_token_is_rejected(self, admin):
+        client = client_for(admin)
+        assert client.get('/api/v1/users/').status_code == 200
+        admin.delete()
+        assert client.get('/api/v1/users/').status_code == 401
+        assert client.get('/api/v1/titles/').status_code == 401
+        assert client.patch(
+            '/api/v1/users/me/', {'bio': 'О себе'}
+        ).status_code == 401
+
+    def test_inactive_user_token_is_rejected(self, admin):
+        client = client_for(admin)
+        User.objects.filter(pk=admin.pk).update(is_active=False)
+        evict(admin)
+        assert client.get('/api/v1/users/').status_code == 401
+        assert client.delete('/api/v1/users/admin/').status_code == 401
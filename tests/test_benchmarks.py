@@ -0,0 +1,18 @@
+import pytest
+from benchmarks.runner import list_bodies, serialization_cost
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestSerializationCost:
+
+    def test_empty_database(self):
+        assert set(list_bodies(10)) == {'titles'}, (
+            'Проверьте, что без произведений и отзывов списки пропускаются'
+        )
+        assert serialization_cost(sample=10, repeat=1) == {}
+
+    def test_titles_without_reviews(self):
+        Title.objects.create(name='Книга', year=2000)
+        assert set(list_bodies(10)) == {'titles', 'reviews'}
+        assert set(serialization_cost(sample=10, repeat=1)) == {'titles'}
@@ -0,0 +1,86 @@
+import pytest
+from reviews.models import Category, Genre, Title
+
+
+@pytest.mark.django_db
+class TestBulkWrite:
+
+    def test_titles_created_with_genres(self, api_admin_client):
+        Category.objects.create(name='Фильм', slug='movie')
+        Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+        response = api_admin_client.post('/api/v1/titles/bulk/', [
+            {'name': 'Первый', 'category': 'movie', 'genre': ['drama']},
+            {'name': 'Второй', 'category': 'movie',
+             'genre': ['drama', 'comedy']},
+        ], format='json')
+        assert response.status_code == 200, response.data
+        assert response.data == {'created': 2, 'updated': 0}
+        second = Title.objects.get(name='Второй')
+        assert set(second.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }, 'Проверьте, что жанры сохраняются для новых произведений'
+
+    def test_update_changes_only_sent_fields(self, api_admin_client):
+        movie = Category.objects.create(name='Фильм', slug='movie')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+        first = Title.objects.create(
+            name='Первый', year=1999, description='Описание', category=movie
+        )
+        first.genre.set([drama])
+        second = Title.objects.create(name='Второй', year=2001, category=movie)
+        response = api_admin_client.post('/api/v1/titles/bulk/', [
+            {'id': first.pk, 'name': 'Первый, новый'},
+            {'id': second.pk, 'genre': ['comedy']},
+            {'name': 'Без категории', 'genre': []},
+        ], format='json')
+        assert response.status_code == 400
+        assert [
+            (error['index'], list(error['errors']))
+            for error in response.data['errors']
+        ] == [(2, ['category'])], (
+            'Проверьте, что новым произведениям категория обязательна'
+        )
+        response = api_admin_client.post('/api/v1/titles/bulk/', [
+            {'id': first.pk, 'name': 'Первый, новый'},
+            {'id': second.pk, 'genre': ['comedy']},
+        ], format='json')
+        assert response.data == {'created': 0, 'updated': 2}
+        first.refresh_from_db()
+        assert (first.name, first.year, first.description) == (
+            'Первый, новый', 1999, 'Описание'
+        ), 'Проверьте, что непереданные поля не затираются'
+        assert first.category == movie
+        assert list(first.genre.values_list('slug', flat=True)) == ['drama'], (
+            'Проверьте, что жанры без genre в элементе не удаляются'
+        )
+        second.refresh_from_db()
+        assert (second.name, second.year) == ('Второй', 2001)
+        assert list(second.genre.values_list('slug', flat=True)) == ['comedy']
+
+    def test_errors_reported_per_item(self, api_admin_client):
+        Category.objects.create(name='Фильм', slug='movie')
+        response = api_admin_client.post('/api/v1/titles/bulk/', [
+            {'name': 'Верный', 'category': 'movie', 'genre': []},
+            {'name': 'Без категории', 'category': 'book', 'genre': []},
+        ], format='json')
+        assert response.status_code == 400
+        assert [error['index'] for error in response.data['errors']] == [1], (
+            'Проверьте, что ошибки возвращаются с индексом элемента'
+        )
+        assert not Title.objects.exists(), (
+            'Проверьте, что пачка с ошибками не записывается'
+        )
+
+    def test_hidden_slugs_are_not_updated(self, api_admin_client):
+        Genre.objects.create(name='Драма', slug='drama', is_hidden=True)
+        response = api_admin_client.post('/api/v1/genres/bulk/', [
+            {'name': 'Новая драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ], format='json')
+        assert response.status_code == 400
+        assert [error['index'] for error in response.data['errors']] == [0], (
+            'Проверьте, что запись, ожидающая удаления, не обновляется'
+        )
+        assert Genre.objects.get(slug='drama').name == 'Драма'
@@ -0,0 +1,175 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from api import compression
+from api.cache import (get_cache, get_version, invalidate, response_key,
+                       version_key)
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Title
+
+
+class TestResponseCache:
+
+    def test_key_depends_on_query_string(self):
+        factory = RequestFactory()
+        first = response_key('titles', factory.get('/api/v1/titles/?year=1'))
+        second = response_key('titles', factory.get('/api/v1/titles/?year=2'))
+        assert first != second, (
+            'Проверьте, что ключ кэша учитывает строку запроса'
+        )
+
+    def test_invalidate_changes_only_given_resource(self):
+        request = RequestFactory().get('/api/v1/genres/')
+        genres_key = response_key('genres', request)
+        categories_key = response_key('categories', request)
+        invalidate('genres')
+        assert response_key('genres', request) != genres_key, (
+            'Проверьте, что запись меняет версию ресурса'
+        )
+        assert response_key('categories', request) == categories_key, (
+            'Проверьте, что запись не сбрасывает кэш других ресурсов'
+        )
+
+    def test_evicted_version_is_not_reused(self):
+        version = get_version('titles')
+        get_cache().delete(version_key('titles'))
+        assert get_version('titles') != version, (
+            'Проверьте, что после вытеснения счётчика версия не повторяется'
+        )
+
+
+@pytest.mark.django_db
+class TestCompressedCache:
+
+    @pytest.fixture
+    def genres(self):
+        return Genre.objects.bulk_create([
+            Genre(name=f'Жанр номер {number} ' * 5, slug=f'genre-{number}')
+            for number in range(10)
+        ])
+
+    def test_encoding_follows_accept_encoding(self, genres):
+        invalidate('genres')
+        client = APIClient()
+        plain = client.get('/api/v1/genres/')
+        assert not plain.has_header('Content-Encoding')
+        assert 'Accept-Encoding' in plain['Vary']
+        body = json.loads(plain.content)
+        response = client.get(
+            '/api/v1/genres/', HTTP_ACCEPT_ENCODING='gzip, deflate, br'
+        )
+        assert response['Content-Encoding'] == 'br', (
+            'Проверьте, что brotli предпочитается gzip'
+        )
+        assert json.loads(brotli.decompress(response.content)) == body
+        response = client.get(
+            '/api/v1/genres/', HTTP_ACCEPT_ENCODING='gzip, br;q=0'
+        )
+        assert response['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(response.content)) == body
+
+    def test_etag_is_weak_and_304_varies(self, genres):
+        client = APIClient()
+        plain = client.get('/api/v1/genres/')
+        packed = client.get('/api/v1/genres/', HTTP_ACCEPT_ENCODING='br')
+        assert packed.content != plain.content
+        assert plain['ETag'].startswith('W/'), (
+            'Проверьте, что ETag слабый: тела в разных кодировках отличаются'
+        )
+        assert packed['ETag'] == plain['ETag']
+        response = client.get(
+            '/api/v1/genres/', HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=plain['ETag'],
+        )
+        assert response.status_code == 304
+        assert 'Accept-Encoding' in response['Vary'], (
+            'Проверьте, что 304 тоже содержит Vary: Accept-Encoding'
+        )
+
+    def test_hit_skips_rendering_and_compression(self, genres, monkeypatch):
+        invalidate('genres')
+        client = APIClient()
+        first = client.get('/api/v1/genres/', HTTP_ACCEPT_ENCODING='gzip')
+
+        def fail(*args, **kwargs):
+            raise AssertionError('Ответ из кэша отрисован или сжат заново')
+
+        monkeypatch.setattr(JSONRenderer, 'render', fail)
+        monkeypatch.setattr(compression.gzip, 'compress', fail)
+        monkeypatch.setattr(compression.brotli, 'compress', fail)
+        second = client.get('/api/v1/genres/', HTTP_ACCEPT_ENCODING='gzip')
+        assert second.content == first.content
+
+    def test_small_body_is_not_compressed(self, genres, settings):
+        settings.API_COMPRESS_MIN_SIZE = 10 ** 6
+        invalidate('genres')
+        response = APIClient().get(
+            '/api/v1/genres/', HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        assert not response.has_header('Content-Encoding'), (
+            'Проверьте, что короткие ответы не сжимаются'
+        )
+        assert len(response.data['results']) == 10
+
+
+@pytest.mark.django_db(transaction=True)
+class TestInvalidationThroughApi:
+
+    def names(self, url):
+        response = APIClient().get(url)
+        return [item['name'] for item in response.data['results']]
+
+    def test_versions_bump_after_commit(self):
+        before = get_version('categories')
+        with transaction.atomic():
+            Category.objects.create(name='Фильм', slug='movie')
+            assert get_version('categories') == before, (
+                'Проверьте, что версия не меняется до фиксации транзакции'
+            )
+        assert get_version('categories') != before
+        with transaction.atomic():
+            Category.objects.create(name='Книга', slug='book')
+            unchanged = get_version('categories')
+            transaction.set_rollback(True)
+        assert get_version('categories') == unchanged, (
+            'Проверьте, что откат транзакции не сбрасывает кэш'
+        )
+
+    def test_create_and_delete_refresh_category_list(self, api_admin_client):
+        assert self.names('/api/v1/categories/') == []
+        api_admin_client.post(
+            '/api/v1/categories/', {'name': 'Фильм', 'slug': 'movie'}
+        )
+        assert self.names('/api/v1/categories/') == ['Фильм'], (
+            'Проверьте, что создание сбрасывает кэш списка'
+        )
+        api_admin_client.delete('/api/v1/categories/movie/')
+        assert self.names('/api/v1/categories/') == [], (
+            'Проверьте, что удаление сбрасывает кэш списка'
+        )
+
+    def test_update_refreshes_title_list(self, api_admin_client):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        title = Title.objects.create(
+            name='Старое', year=2000, category=category
+        )
+        assert self.names('/api/v1/titles/') == ['Старое']
+        response = api_admin_client.patch(
+            f'/api/v1/titles/{title.pk}/', {'name': 'Новое'}
+        )
+        assert response.status_code == 200, response.data
+        assert self.names('/api/v1/titles/') == ['Новое'], (
+            'Проверьте, что правка сбрасывает кэш списка произведений'
+        )
+
+    def test_bulk_write_refreshes_genre_list(self, api_admin_client):
+        assert self.names('/api/v1/genres/') == []
+        api_admin_client.post('/api/v1/genres/bulk/', [
+            {'name': 'Драма', 'slug': 'drama'},
+        ], format='json')
+        assert self.names('/api/v1/genres/') == ['Драма']
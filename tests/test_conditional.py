@@ -0,0 +1,83 @@
+import pytest
+from api.authentication import get_access_token
+from api.cache import get_cache
+from rest_framework.test import APIClient
+from reviews.models import Category, Review, Title, User
+
+
+@pytest.fixture
+def review():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    title = Title.objects.create(name='Фильм', year=2000, category=category)
+    author = User.objects.create(username='author', email='author@yamdb.ru')
+    return Review.objects.create(
+        title=title, author=author, text='Текст', score=5
+    )
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def test_unchanged_list_returns_not_modified(self, review):
+        client = APIClient()
+        for url in (
+            '/api/v1/titles/',
+            '/api/v1/categories/',
+            f'/api/v1/titles/{review.title_id}/reviews/',
+        ):
+            etag = client.get(url)['ETag']
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304, (
+                f'Проверьте, что {url} отвечает 304 на совпавший ETag'
+            )
+
+    def test_edit_changes_etag(self, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        client = APIClient()
+        etag = client.get(url)['ETag']
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {get_access_token(review.author)}'
+        )
+        client.patch(f'{url}{review.pk}/', {'text': 'Новый текст'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что правка отзыва меняет ETag списка'
+        )
+
+    @pytest.mark.parametrize('rename', ['title', 'author'])
+    def test_related_edit_changes_reviews_etag(self, review, rename):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        client = APIClient()
+        etag = client.get(url)['ETag']
+        related = getattr(review, rename)
+        if rename == 'title':
+            related.name = 'Новое название'
+        else:
+            related.username = 'renamed'
+        related.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f'Проверьте, что правка {rename} меняет ETag списка отзывов'
+        )
+
+    def test_review_edit_changes_comments_etag(self, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/comments/'
+        client = APIClient()
+        etag = client.get(url)['ETag']
+        review.text = 'Новый текст'
+        review.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что правка отзыва меняет ETag его комментариев'
+        )
+
+    def test_change_marks_survive_cache_flush(self, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        client = APIClient()
+        review.text = 'Новый текст'
+        review.save()
+        etag = client.get(url)['ETag']
+        get_cache().clear()
+        assert client.get(url)['ETag'] == etag, (
+            'Проверьте, что отметки о правках не теряются вместе с кэшем'
+        )
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from reviews.deletion import process_batch, schedule_deletion
+from reviews.models import (Category, Comment, DeletionJob, Genre, Review,
+                            Title, User)
+
+
+@pytest.fixture
+def title():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Фильм', year=2000, category=category)
+    title.genre.set([genre])
+    for number in range(5):
+        author = User.objects.create(
+            username=f'u{number}', email=f'u{number}@yamdb.ru'
+        )
+        review = Review.objects.create(
+            title=title, author=author, text='Текст', score=5
+        )
+        Comment.objects.create(review=review, author=author, text='Да')
+    return title
+
+
+def run_jobs(batch_size):
+    batches = 0
+    while process_batch(batch_size) is not None:
+        batches += 1
+    return batches
+
+
+@pytest.mark.django_db
+def test_title_hidden_at_once_and_removed_in_batches(api_admin_client, title):
+    response = api_admin_client.delete(f'/api/v1/titles/{title.pk}/')
+    assert response.status_code == 202, response.data
+    assert response['Location'].endswith(
+        f'/api/v1/deletions/{response.data["id"]}/'
+    )
+    assert Review.objects.count() == 5
+    detail = api_admin_client.get(f'/api/v1/titles/{title.pk}/')
+    assert detail.status_code == 404
+    assert api_admin_client.get('/api/v1/titles/').data['results'] == []
+    assert api_admin_client.get(
+        f'/api/v1/titles/{title.pk}/reviews/'
+    ).status_code == 404
+    # 5 комментариев, 5 отзывов, связь с жанром, две строки рейтинга
+    # и сама запись.
+    assert run_jobs(batch_size=2) == 3 + 3 + 1 + 1 + 1
+    assert not Title.objects.exists()
+    assert not Review.objects.exists()
+    assert not Comment.objects.exists()
+    job = api_admin_client.get(response['Location']).data
+    assert job['finished'] is not None
+    assert job['processed'] == 13
+
+
+@pytest.mark.django_db
+def test_category_and_genre_deleted_in_background(api_admin_client, title):
+    assert api_admin_client.delete(
+        '/api/v1/categories/movie/'
+    ).status_code == 202
+    assert api_admin_client.delete('/api/v1/genres/drama/').status_code == 202
+    assert api_admin_client.get('/api/v1/categories/').data['results'] == []
+    assert api_admin_client.get('/api/v1/genres/').data['results'] == []
+    call_command('run_deletion_worker', once=True, batch_size=1)
+    title.refresh_from_db()
+    assert title.category is None
+    assert not title.genre.exists()
+    assert not Category.objects.exists()
+    assert not Genre.objects.exists()
+    assert not DeletionJob.objects.filter(finished__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_deletions_are_admin_only(title):
+    client = APIClient()
+    assert client.delete(f'/api/v1/titles/{title.pk}/').status_code == 401
+    assert client.get('/api/v1/deletions/').status_code == 401
+
+
+def read_lines(response):
+    return [
+        json.loads(line)
+        for line in b''.join(response.streaming_content).splitlines()
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fast_list', [True, False])
+def test_hidden_relations_are_not_nested(
+    api_admin_client, title, settings, fast_list
+):
+    settings.API_FAST_LIST = fast_list
+    api_admin_client.delete('/api/v1/categories/movie/')
+    api_admin_client.delete('/api/v1/genres/drama/')
+    client = APIClient()
+    for params in ({}, {'expand': 'genre'}, {'fields': 'genre,category'}):
+        item = client.get('/api/v1/titles/', params).data['results'][0]
+        assert item['genre'] == [], params
+        assert item['category'] is None, params
+    detail = client.get(f'/api/v1/titles/{title.pk}/').data
+    assert detail['genre'] == []
+    assert detail['category'] is None
+    exported = read_lines(api_admin_client.get('/api/v1/export/titles/'))
+    assert exported[0]['genre'] == []
+    assert exported[0]['category'] is None
+
+
+@pytest.mark.django_db
+def test_reviews_of_hidden_title_are_not_exported(api_admin_client, title):
+    url = '/api/v1/export/reviews/'
+    assert len(read_lines(api_admin_client.get(url))) == 5
+    api_admin_client.delete(f'/api/v1/titles/{title.pk}/')
+    assert read_lines(api_admin_client.get(url)) == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_finished_job_refreshes_cached_titles(title):
+    client = APIClient()
+    cached = client.get('/api/v1/titles/')
+    assert cached.data['results'][0]['genre'] == [
+        {'name': 'Драма', 'slug': 'drama'}
+    ]
+    # Задание поставлено в другом процессе, кэш здесь не сбрасывался.
+    schedule_deletion(Genre.objects.get(slug='drama'))
+    call_command('run_deletion_worker', once=True)
+    response = client.get(
+        '/api/v1/titles/', HTTP_IF_NONE_MATCH=cached['ETag']
+    )
+    assert response.status_code == 200
+    assert response['ETag'] != cached['ETag']
+    assert response.data['results'][0]['genre'] == []
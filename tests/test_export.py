@@ -0,0 +1,102 @@
+import gzip
+import json
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title, User
+
+
+@pytest.fixture
+def reviews():
+    category = Category.objects.create(name='Книга', slug='book')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Книга', year=2000, category=category)
+    title.genre.set([genre])
+    reviews = [
+        Review.objects.create(
+            title=title,
+            author=User.objects.create(
+                username=f'u{number}', email=f'u{number}@yamdb.ru'
+            ),
+            text='Текст', score=number + 1,
+        )
+        for number in range(5)
+    ]
+    # У всех отзывов одна дата публикации.
+    Review.objects.update(pub_date=timezone.now())
+    return Review.objects.order_by('pk')
+
+
+def read_lines(response):
+    assert response.status_code == 200
+    body = b''.join(response.streaming_content)
+    if response.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return [json.loads(line) for line in body.splitlines()]
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_titles_stream(self, api_admin_client, reviews):
+        response = api_admin_client.get(
+            '/api/v1/export/titles/', {'chunk_size': 1}
+        )
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        assert 'titles.ndjson' in response['Content-Disposition']
+        assert read_lines(response) == [{
+            'id': reviews[0].title_id, 'name': 'Книга', 'year': 2000,
+            'category': 'book', 'genre': ['drama'], 'description': '',
+            'rating': 3.0,
+        }]
+
+    @pytest.mark.parametrize('header, encoding', [
+        ('gzip, deflate', 'gzip'),
+        ('*', 'gzip'),
+        ('gzip;q=0, deflate', None),
+        ('x-gzip-like', None),
+        ('', None),
+    ])
+    def test_gzip_follows_accept_encoding(self, api_admin_client, reviews,
+                                          header, encoding):
+        response = api_admin_client.get(
+            '/api/v1/export/reviews/', HTTP_ACCEPT_ENCODING=header
+        )
+        assert response.get('Content-Encoding') == encoding
+        assert 'Accept-Encoding' in response['Vary']
+        assert len(read_lines(response)) == 5
+
+    def test_since_keeps_reviews_with_same_date(self, api_admin_client,
+                                                reviews):
+        rows = read_lines(api_admin_client.get('/api/v1/export/reviews/'))
+        assert [row['id'] for row in rows] == [
+            review.pk for review in reviews
+        ]
+        boundary = rows[1]
+        rows = read_lines(api_admin_client.get(
+            '/api/v1/export/reviews/', {'since': boundary['pub_date']}
+        ))
+        assert len(rows) == 5, (
+            'Проверьте, что отзывы с датой since не теряются'
+        )
+        rows = read_lines(api_admin_client.get('/api/v1/export/reviews/', {
+            'since': boundary['pub_date'], 'since_id': boundary['id'],
+        }))
+        assert [row['id'] for row in rows] == [
+            review.pk for review in reviews[2:]
+        ], 'Проверьте, что с since_id выгрузка идёт без пропусков и повторов'
+
+    @pytest.mark.parametrize('params', [
+        {'since': 'вчера'},
+        {'since': '2020-01-01T00:00:00', 'since_id': 'x'},
+        {'chunk_size': 'много'},
+    ])
+    def test_bad_params(self, api_admin_client, params):
+        response = api_admin_client.get('/api/v1/export/reviews/', params)
+        assert response.status_code == 400
+
+    def test_export_is_admin_only(self, reviews):
+        assert APIClient().get(
+            '/api/v1/export/titles/'
+        ).status_code == 401
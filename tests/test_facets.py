@@ -0,0 +1,86 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def catalog():
+    book = Category.objects.create(name='Книга', slug='book')
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    for name, year, category, genres in (
+        ('Первая', 1985, book, [drama]),
+        ('Вторая', 1989, movie, [drama, comedy]),
+        ('Третья', 2003, movie, [comedy]),
+        ('Четвёртая', None, None, []),
+    ):
+        title = Title.objects.create(name=name, year=year, category=category)
+        title.genre.set(genres)
+
+
+def get_facets(params):
+    with CaptureQueriesContext(connection) as queries:
+        response = APIClient().get('/api/v1/titles/', params)
+    assert response.status_code == 200, response.data
+    return response.data['facets'], queries
+
+
+@pytest.mark.django_db(transaction=True)
+def test_catalog_facets_cached_until_write(catalog):
+    facets, _ = get_facets({'facets': 'genre,category,year'})
+    assert facets['genre'] == [
+        {'slug': 'comedy', 'name': 'Комедия', 'count': 2},
+        {'slug': 'drama', 'name': 'Драма', 'count': 2},
+    ]
+    assert facets['category'] == [
+        {'slug': 'movie', 'name': 'Фильм', 'count': 2},
+        {'slug': 'book', 'name': 'Книга', 'count': 1},
+    ]
+    assert facets['year'] == [
+        {'decade': 1980, 'count': 2},
+        {'decade': 2000, 'count': 1},
+    ]
+    facets, queries = get_facets({'facets': 'year', 'ordering': 'name'})
+    assert facets == {'year': [
+        {'decade': 1980, 'count': 2},
+        {'decade': 2000, 'count': 1},
+    ]}
+    assert not any(
+        'UNION' in query['sql'] for query in queries.captured_queries
+    )
+    Title.objects.create(name='Пятая', year=2010)
+    facets, _ = get_facets({'facets': 'year', 'ordering': 'year'})
+    assert facets['year'][-1] == {'decade': 2010, 'count': 1}
+
+
+@pytest.mark.django_db
+def test_filtered_facets_in_one_query(catalog):
+    facets, queries = get_facets(
+        {'genre': 'comedy', 'facets': 'genre,category,year'}
+    )
+    assert facets['genre'] == [
+        {'slug': 'comedy', 'name': 'Комедия', 'count': 2},
+        {'slug': 'drama', 'name': 'Драма', 'count': 1},
+    ]
+    assert facets['category'] == [
+        {'slug': 'movie', 'name': 'Фильм', 'count': 2},
+    ]
+    assert facets['year'] == [
+        {'decade': 1980, 'count': 1},
+        {'decade': 2000, 'count': 1},
+    ]
+    assert [
+        'UNION' in query['sql'] for query in queries.captured_queries
+    ].count(True) == 1
+
+
+@pytest.mark.django_db
+def test_facets_are_optional_and_validated(catalog):
+    client = APIClient()
+    assert 'facets' not in client.get('/api/v1/titles/').data
+    response = client.get('/api/v1/titles/', {'facets': 'author'})
+    assert response.status_code == 400
+    assert 'facets' in response.data
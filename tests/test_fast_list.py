@@ -0,0 +1,60 @@
+import pytest
+from api.authentication import get_access_token
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+@pytest.fixture
+def catalog():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    first = Title.objects.create(
+        name='Первый', year=1999, category=category, description='Описание'
+    )
+    first.genre.add(drama, comedy)
+    second = Title.objects.create(name='Второй')
+    second.genre.add(comedy)
+    users = [
+        User.objects.create(username=f'user{number}', email=f'{number}@x.ru')
+        for number in range(3)
+    ]
+    for number, user in enumerate(users):
+        review = Review.objects.create(
+            title=first, author=user, text=f'Отзыв {number}', score=number + 7
+        )
+        Comment.objects.create(review=review, author=users[0], text='Да')
+        Comment.objects.create(review=review, author=user, text='Нет')
+    return first, review
+
+
+def get_content(settings, client, url, fast):
+    settings.API_FAST_LIST = fast
+    response = client.get(url)
+    assert response.status_code == 200, response.data
+    return response.content
+
+
+@pytest.mark.django_db
+def test_fast_list_matches_serializers(settings, catalog):
+    title, review = catalog
+    user = User.objects.create(username='reader', email='reader@x.ru')
+    # Запросы с токеном не кэшируются, оба пути выполняются честно.
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}')
+    reviews = f'/api/v1/titles/{title.pk}/reviews/'
+    comments = f'{reviews}{review.pk}/comments/'
+    for url in (
+        '/api/v1/titles/',
+        '/api/v1/titles/?ordering=-rating',
+        '/api/v1/titles/?fields=id,rating,genre&expand=',
+        '/api/v1/titles/?fields=name,category&expand=category',
+        reviews,
+        f'{reviews}?cursor=',
+        comments,
+        f'{comments}?cursor=',
+    ):
+        assert (
+            get_content(settings, client, url, fast=True)
+            == get_content(settings, client, url, fast=False)
+        ), f'Проверьте, что быстрый список {url} совпадает с сериализатором'
@@ -0,0 +1,149 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title, User
+from reviews.slugs import find_slugs, slug_index_sql
+
+
+@pytest.fixture
+def catalog():
+    book = Category.objects.create(name='Книга', slug='book')
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    music = Category.objects.create(name='Музыка', slug='music')
+    rock = Genre.objects.create(name='Рок', slug='rock')
+    jazz = Genre.objects.create(name='Джаз', slug='jazz')
+    for name, category, genres in (
+        ('Альбом', music, [rock, jazz]),
+        ('Концерт', movie, [rock]),
+        ('Пластинка', music, [jazz]),
+        ('Роман', book, []),
+    ):
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.set(genres)
+
+
+@pytest.fixture
+def rated():
+    author = User.objects.create(username='author', email='author@yamdb.ru')
+    for name, year, score in (
+        ('Высокий', 1990, 9),
+        ('Низкий', 2005, 4),
+        ('Без оценок', None, None),
+        ('Средний', 2010, 6),
+    ):
+        title = Title.objects.create(name=name, year=year)
+        if score is not None:
+            Review.objects.create(
+                title=title, author=author, text='Текст', score=score
+            )
+
+
+def get_names(params):
+    with CaptureQueriesContext(connection) as queries:
+        response = APIClient().get('/api/v1/titles/', params)
+    assert response.status_code == 200, response.data
+    names = [title['name'] for title in response.data['results']]
+    assert response.data['count'] == len(names)
+    return names, queries.captured_queries
+
+
+@pytest.mark.django_db
+def test_genres_any_and_all(catalog):
+    names, queries = get_names({'genre': 'Rock,jazz'})
+    assert names == ['Альбом', 'Концерт', 'Пластинка']
+    sql = next(
+        query['sql'] for query in queries if 'LIMIT' in query['sql']
+    )
+    assert 'EXISTS' in sql
+    assert 'DISTINCT' not in sql
+    assert '"reviews_genre"' not in sql
+    names, _ = get_names({'genre': 'rock,jazz', 'genre_mode': 'all'})
+    assert names == ['Альбом']
+    names, _ = get_names({'genre': 'rock,punk', 'genre_mode': 'all'})
+    assert names == []
+    names, _ = get_names({'genre': 'rock,punk'})
+    assert names == ['Альбом', 'Концерт']
+
+
+@pytest.mark.django_db
+def test_several_categories(catalog):
+    names, _ = get_names({'category': 'book,MOVIE'})
+    assert names == ['Концерт', 'Роман']
+    names, _ = get_names({'category': 'music', 'genre': 'rock'})
+    assert names == ['Альбом']
+    assert get_names({'category': 'unknown'})[0] == []
+
+
+@pytest.mark.django_db
+def test_slugs_matched_ignoring_case(catalog):
+    scifi = Genre.objects.create(name='Фантастика', slug='Sci-Fi')
+    Title.objects.get(name='Роман').genre.add(scifi)
+    for value in ('sci-fi', 'SCI-FI', 'Sci-Fi'):
+        assert get_names({'genre': value})[0] == ['Роман'], (
+            'Проверьте, что слаг ищется без учёта регистра'
+        )
+    _, queries = get_names({'category': 'MOVIE,music'})
+    lookup = next(
+        query['sql'] for query in queries
+        if 'FROM "reviews_category"' in query['sql']
+    )
+    assert 'UPPER("reviews_category"."slug") IN' in lookup
+    assert ' OR ' not in lookup
+
+
+def test_slug_index_matches_lookup(postgresql):
+    for model in (Category, Genre):
+        sql, params = slug_index_sql(model, postgresql)
+        lookup, _ = find_slugs(model.objects.all(), ['rock']).query \
+            .get_compiler(connection=postgresql).as_sql()
+        table = f'"{model._meta.db_table}"'
+        expression = sql[sql.index('((') + 2:sql.rindex('))')]
+        assert not params
+        assert expression.replace('"slug"', f'{table}."slug"') + ' IN' \
+            in lookup, 'Проверьте, что индекс совпадает с выражением поиска'
+
+
+@pytest.mark.django_db
+def test_slugs_resolved_once_per_request(catalog):
+    _, queries = get_names({
+        'genre': 'rock', 'category': 'music', 'facets': 'genre,year',
+    })
+    lookups = [
+        query for query in queries
+        if 'FROM "reviews_genre"' in query['sql'] and 'UNION' not in query['sql']
+    ]
+    assert len(lookups) == 1
+
+
+@pytest.mark.django_db
+def test_unknown_genre_mode(catalog):
+    response = APIClient().get(
+        '/api/v1/titles/', {'genre': 'rock', 'genre_mode': 'some'}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('ordering, expected', [
+    ('rating', ['Низкий', 'Средний', 'Высокий', 'Без оценок']),
+    ('-rating', ['Высокий', 'Средний', 'Низкий', 'Без оценок']),
+    ('year', ['Высокий', 'Низкий', 'Средний', 'Без оценок']),
+    ('-year', ['Средний', 'Низкий', 'Высокий', 'Без оценок']),
+])
+def test_ordering_puts_nulls_last(rated, ordering, expected):
+    assert get_names({'ordering': ordering})[0] == expected
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params, expected', [
+    ({'rating_min': 5}, ['Высокий', 'Средний']),
+    ({'rating_max': 6}, ['Низкий', 'Средний']),
+    ({'rating_min': 5, 'rating_max': 8}, ['Средний']),
+    ({'year_min': 2000}, ['Низкий', 'Средний']),
+    ({'year_max': 2005}, ['Высокий', 'Низкий']),
+    ({'year_min': 2000, 'year_max': 2005}, ['Низкий']),
+])
+def test_range_filters(rated, params, expected):
+    names, _ = get_names({**params, 'ordering': 'year'})
+    assert names == expected
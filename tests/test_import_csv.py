@@ -0,0 +1,73 @@
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from reviews.models import (Comment, GenreTitle, Review, Title, TitleRanking,
+                            TitleStats)
+
+FILES = {
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,reader,reader@yamdb.fake,user,,,\n'
+        '101,critic,critic@yamdb.fake,moderator,Критик,,\n'
+    ),
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n',
+    'titles.csv': (
+        'id,name,year,category\n'
+        '1,Побег из Шоушенка,1994,1\n'
+        '2,Без категории,,9\n'
+    ),
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n2,3,1\n',
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,"Десять звёзд,\nбез сомнений",100,10,2020-01-13T23:20:02Z\n'
+        '2,1,Хорошо,101,6,2020-01-14T10:00:00Z\n'
+        '3,5,Нет такого произведения,100,1,\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Согласен,101,2020-01-15T08:00:00Z\n'
+    ),
+}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name, content in FILES.items():
+        (tmp_path / name).write_text(content, encoding='utf-8')
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_import_loads_rows_and_counters(data_dir, capsys):
+    call_command('import_csv', path=str(data_dir), batch_size=1)
+    output = capsys.readouterr().out
+    assert 'review.csv: 2 строк' in output
+    assert 'пропущено: 1' in output
+    title = Title.objects.get(pk=1)
+    assert (title.reviews_count, title.score_sum) == (2, 16)
+    assert Title.objects.get(pk=2).category_id is None
+    assert GenreTitle.objects.count() == 1
+    review = Review.objects.get(pk=1)
+    assert review.text == 'Десять звёзд,\nбез сомнений'
+    assert review.pub_date.isoformat() == '2020-01-13T23:20:02+00:00', (
+        'Проверьте, что дата отзыва берётся из файла'
+    )
+    assert Comment.objects.get().author.username == 'critic'
+    assert TitleStats.objects.get(title=title).comments_count == 1
+    assert TitleRanking.objects.filter(title=title).count() == 2
+
+
+@pytest.mark.django_db
+def test_import_refreshes_api_cache(data_dir):
+    client = APIClient()
+    assert client.get('/api/v1/titles/').data['results'] == []
+    assert client.get('/api/v1/genres/').data['results'] == []
+    call_command('import_csv', path=str(data_dir))
+    titles = client.get('/api/v1/titles/').data['results']
+    assert {title['name'] for title in titles} == {
+        'Побег из Шоушенка', 'Без категории'
+    }, 'Проверьте, что после импорта кэш API сбрасывается'
+    assert client.get('/api/v1/genres/').data['results'] == [
+        {'name': 'Драма', 'slug': 'drama'}
+    ]
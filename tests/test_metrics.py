@@ -0,0 +1,86 @@
+import re
+
+import pytest
+from api.authentication import get_access_token
+from api.metrics import DB_QUERIES, REQUEST_DURATION, Histogram
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIClient
+from reviews.models import Category, User
+
+
+class TestMetrics:
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('test_seconds', 'Тест.', (0.1, 1))
+        labels = (('route', 'title-list'), ('method', 'GET'))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(labels, value)
+        lines = list(histogram.render())
+        prefix = 'test_seconds_bucket{route="title-list",method="GET",'
+        assert prefix + 'le="0.1"} 2' in lines, (
+            'Проверьте, что значение на границе попадает в корзину le'
+        )
+        assert prefix + 'le="1"} 3' in lines
+        assert prefix + 'le="+Inf"} 4' in lines
+        assert (
+            'test_seconds_count{route="title-list",method="GET"} 4' in lines
+        ), 'Проверьте, что считается общее число наблюдений'
+
+    def test_label_values_are_escaped(self):
+        histogram = Histogram('test_seconds', 'Тест.', (1,))
+        histogram.observe((('route', 'a"b'),), 0.5)
+        assert 'test_seconds_count{route="a\\"b"} 1' in list(
+            histogram.render()
+        ), 'Проверьте экранирование кавычек в значениях меток'
+
+
+def client_for(role):
+    user = User.objects.create(
+        username=role, email=f'{role}@yamdb.ru', role=role
+    )
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}')
+    return client
+
+
+def count(histogram, labels):
+    series = histogram.series.get(labels)
+    return series.count if series else 0
+
+
+@pytest.mark.django_db
+class TestPerformanceMiddleware:
+
+    def test_server_timing_header(self):
+        Category.objects.create(name='Фильм', slug='movie')
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get('/api/v1/categories/')
+        timing = response['Server-Timing']
+        for name in ('db', 'view', 'render', 'total'):
+            assert re.search(rf'\b{name};dur=\d+\.\d{{2}}', timing), (
+                f'Проверьте, что Server-Timing содержит {name}'
+            )
+        assert f'queries;desc="{len(queries.captured_queries)}"' in timing
+
+    def test_requests_are_recorded(self):
+        labels = (
+            ('route', resolve('/api/v1/categories/').view_name),
+            ('method', 'GET'),
+        )
+        before = count(REQUEST_DURATION, labels)
+        queries_before = count(DB_QUERIES, labels)
+        APIClient().get('/api/v1/categories/')
+        assert count(REQUEST_DURATION, labels) == before + 1
+        assert count(DB_QUERIES, labels) == queries_before + 1
+
+    def test_metrics_are_admin_only(self):
+        APIClient().get('/api/v1/categories/')
+        assert APIClient().get('/metrics').status_code == 401
+        assert client_for('user').get('/metrics').status_code == 403
+        response = client_for('admin').get('/metrics')
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert '# TYPE yamdb_request_duration_seconds histogram' in body
+        assert 'yamdb_db_queries_count{route="' in body
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import OutgoingEmail
+from reviews.outbox import MAX_BACKOFF, enqueue_email, retry_delay, send_batch
+
+
+class TestMailOutbox:
+
+    def test_retry_delay_grows_and_is_capped(self):
+        delays = [retry_delay(attempt) for attempt in range(1, 20)]
+        assert delays == sorted(delays), (
+            'Проверьте, что пауза перед повтором растёт с числом попыток'
+        )
+        assert delays[1] == 2 * delays[0], (
+            'Проверьте, что пауза растёт экспоненциально'
+        )
+        assert delays[-1] == timedelta(seconds=MAX_BACKOFF), (
+            'Проверьте, что пауза перед повтором ограничена'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestMailWorker:
+
+    def test_signup_is_delivered_by_worker(self, mailoutbox):
+        response = APIClient().post('/api/v1/auth/signup/', {
+            'username': 'new', 'email': 'new@yamdb.ru'
+        })
+        assert response.status_code == 200, response.data
+        assert mailoutbox == [], (
+            'Проверьте, что регистрация не отправляет письмо сама'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.to == 'new@yamdb.ru'
+        call_command('run_mail_worker', '--once')
+        assert [message.to for message in mailoutbox] == [['new@yamdb.ru']]
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        assert email.attempts == 1
+
+    def test_send_happens_outside_transaction(self, monkeypatch):
+        enqueue_email('Тема', 'Текст', 'from@yamdb.ru', 'to@yamdb.ru')
+        in_transaction = []
+
+        def send_messages(backend, messages):
+            in_transaction.append(connection.in_atomic_block)
+            return len(messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', send_messages)
+        assert send_batch(10, 5) == (1, 0)
+        assert in_transaction == [False], (
+            'Проверьте, что письма отправляются вне транзакции с блокировками'
+        )
+
+    def test_failed_send_is_retried_later(self, monkeypatch):
+        enqueue_email('Тема', 'Текст', 'from@yamdb.ru', 'to@yamdb.ru')
+
+        def send_messages(backend, messages):
+            raise OSError('сервер недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', send_messages)
+        assert send_batch(10, 5) == (0, 1)
+        email = OutgoingEmail.objects.get()
+        assert email.attempts == 1
+        assert email.last_error == 'сервер недоступен'
+        assert email.sent_at is None
+        assert email.send_after > timezone.now()
+        assert send_batch(10, 5) == (0, 0)
+        assert mail.outbox == []
+
+    def test_connection_error_returns_batch(self, monkeypatch):
+        enqueue_email('Тема', 'Текст', 'from@yamdb.ru', 'to@yamdb.ru')
+
+        def open_connection(backend):
+            raise OSError('нет соединения')
+
+        monkeypatch.setattr(EmailBackend, 'open', open_connection)
+        with pytest.raises(OSError):
+            send_batch(10, 5)
+        email = OutgoingEmail.objects.get()
+        assert email.attempts == 0
+        assert email.send_after <= timezone.now(), (
+            'Проверьте, что без соединения письма сразу возвращаются в очередь'
+        )
@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews import paginator
+from reviews.models import Comment, Review, Title, User
+
+
+@pytest.fixture
+def titles(make_titles):
+    return make_titles(*(f'Книга {number:02}' for number in range(12)))
+
+
+@pytest.fixture
+def large_estimate(monkeypatch, settings):
+    settings.APPROXIMATE_COUNT_THRESHOLD = 1000
+    monkeypatch.setattr(paginator, 'estimate_count', lambda queryset: 10**6)
+
+
+@pytest.mark.django_db
+def test_exact_count_below_threshold(titles):
+    data = APIClient().get('/api/v1/titles/').data
+    assert data['count'] == 12
+    assert data['count_approximate'] is False
+
+
+@pytest.mark.django_db
+def test_estimate_above_threshold(titles, large_estimate):
+    client = APIClient()
+    first = client.get('/api/v1/titles/').data
+    assert first['count'] == 10**6
+    assert first['count_approximate'] is True
+    assert first['next'].endswith('?page=2')
+    # Следующая страница определяется по строкам, а не по оценке.
+    second = client.get('/api/v1/titles/', {'page': 2}).data
+    assert len(second['results']) == 2
+    assert second['next'] is None
+    assert client.get(
+        '/api/v1/titles/', {'page': 3}
+    ).status_code == 404
+
+
+@pytest.mark.django_db
+def test_admin_marks_approximate_count(titles, large_estimate):
+    admin = User.objects.create_superuser(
+        username='root', email='root@yamdb.ru', password='password'
+    )
+    for title in Title.objects.all():
+        Review.objects.create(
+            title=title, author=admin, text='Текст', score=5
+        )
+    client = Client()
+    client.force_login(admin)
+    response = client.get('/admin/reviews/review/')
+    assert response.status_code == 200
+    assert '≈1000000' in response.content.decode()
+
+
+@pytest.fixture
+def reviews(titles):
+    title = Title.objects.first()
+    reviews = [
+        Review.objects.create(
+            title=title,
+            author=User.objects.create(
+                username=f'u{number}', email=f'u{number}@yamdb.ru'
+            ),
+            text='Текст', score=5,
+        )
+        for number in range(25)
+    ]
+    # Почти у всех отзывов одна дата: порядок решает id.
+    moment = timezone.now()
+    Review.objects.update(pub_date=moment)
+    Review.objects.filter(pk=reviews[3].pk).update(
+        pub_date=moment + timedelta(days=1)
+    )
+    return title, reviews
+
+
+def walk(url):
+    """id записей всех страниц по ссылкам next и число страниц."""
+    client = APIClient()
+    ids, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.data
+        assert 'count' not in response.data
+        ids += [item['id'] for item in response.data['results']]
+        url = response.data['next']
+        pages += 1
+    return ids, pages
+
+
+@pytest.mark.django_db
+def test_review_cursor_walks_ties_without_gaps(reviews):
+    title, reviews = reviews
+    ids, pages = walk(f'/api/v1/titles/{title.pk}/reviews/?cursor=')
+    newest = reviews[3].pk
+    assert ids == [newest] + sorted(
+        (review.pk for review in reviews if review.pk != newest),
+        reverse=True,
+    ), 'Проверьте, что при равной дате порядок и границы страниц задаёт id'
+    assert pages == 3
+
+
+@pytest.mark.django_db
+def test_comment_cursor_goes_forward(reviews):
+    title, reviews = reviews
+    review = reviews[0]
+    comments = [
+        Comment.objects.create(
+            review=review, author=review.author, text=f'Комментарий {number}'
+        )
+        for number in range(12)
+    ]
+    Comment.objects.update(pub_date=timezone.now())
+    ids, pages = walk(
+        f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/?cursor='
+    )
+    assert ids == [comment.pk for comment in comments]
+    assert pages == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('cursor', ['не-курсор', 'MjAyMHwx', 'eHx5'])
+def test_invalid_cursor(reviews, cursor):
+    title, _ = reviews
+    response = APIClient().get(
+        f'/api/v1/titles/{title.pk}/reviews/', {'cursor': cursor}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,78 @@
+import pytest
+from api.authentication import get_access_token
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Review, Title, User
+
+
+def create_reviews(title, count):
+    reviews = []
+    for number in range(count):
+        author = User.objects.create(
+            username=f'{title.pk}-{number}',
+            email=f'{title.pk}-{number}@yamdb.ru',
+        )
+        reviews.append(Review.objects.create(
+            title=title, author=author, text='Текст', score=5
+        ))
+    return reviews
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, response.data
+    return len(queries.captured_queries)
+
+
+@pytest.fixture
+def client():
+    user = User.objects.create(username='reader', email='reader@yamdb.ru')
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}')
+    # Первый запрос кладёт пользователя в кэш аутентификации.
+    client.get('/api/v1/categories/')
+    return client
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+
+    @pytest.fixture(
+        autouse=True, params=[False, True], ids=['serializers', 'fast']
+    )
+    def fast_list(self, request, settings):
+        # Проверяются оба пути: сериализаторы с prefetch и списки
+        # из values(), включённые по умолчанию.
+        settings.API_FAST_LIST = request.param
+
+    def test_reviews_list_does_not_depend_on_size(self, client, category):
+        small = Title.objects.create(name='Мало', year=2000, category=category)
+        large = Title.objects.create(name='Много', year=2000, category=category)
+        create_reviews(small, 1)
+        create_reviews(large, 8)
+        assert (
+            count_queries(client, f'/api/v1/titles/{small.pk}/reviews/')
+            == count_queries(client, f'/api/v1/titles/{large.pk}/reviews/')
+        ), 'Проверьте, что автор и произведение отзыва не загружаются по одному'
+
+    def test_comments_list_does_not_depend_on_size(self, client, category):
+        title = Title.objects.create(name='Фильм', year=2000, category=category)
+        small, large = create_reviews(title, 2)
+        for number in range(8):
+            Comment.objects.create(
+                review=large if number else small,
+                author=large.author if number % 2 else small.author,
+                text='Комментарий',
+            )
+        url = f'/api/v1/titles/{title.pk}/reviews/{{}}/comments/'
+        assert (
+            count_queries(client, url.format(small.pk))
+            == count_queries(client, url.format(large.pk))
+        ), 'Проверьте, что автор и отзыв комментария не загружаются по одному'
@@ -0,0 +1,123 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Review, Title
+
+
+@pytest.fixture
+def titles(make_titles):
+    return make_titles('Первая', 'Вторая')
+
+
+def stored(title):
+    title.refresh_from_db()
+    return title.reviews_count, title.score_sum
+
+
+def get_rating(title):
+    response = APIClient().get(f'/api/v1/titles/{title.pk}/')
+    assert response.status_code == 200, response.data
+    return response.data['rating']
+
+
+@pytest.mark.django_db(transaction=True)
+class TestStoredRating:
+
+    def test_rating_is_read_from_counters(self, titles, authors):
+        first, _ = titles
+        assert get_rating(first) is None
+        for author, score in zip(authors, (10, 5, 6)):
+            Review.objects.create(
+                title=first, author=author, text='Текст', score=score
+            )
+        assert stored(first) == (3, 21)
+        assert get_rating(first) == 7
+
+    def test_signals_apply_deltas(self, titles, authors):
+        first, second = titles
+        review = Review.objects.create(
+            title=first, author=authors[0], text='Текст', score=4
+        )
+        Review.objects.create(
+            title=first, author=authors[1], text='Текст', score=8
+        )
+        assert stored(first) == (2, 12)
+        review = Review.objects.get(pk=review.pk)
+        review.score = 10
+        review.save()
+        assert stored(first) == (2, 18), (
+            'Проверьте, что смена оценки сдвигает сумму на разницу'
+        )
+        review.title = second
+        review.save()
+        assert stored(first) == (1, 8)
+        assert stored(second) == (1, 10), (
+            'Проверьте, что перенос отзыва переносит оценку'
+        )
+        review.delete()
+        assert stored(second) == (0, 0)
+        assert stored(first) == (1, 8)
+
+    def test_stale_instance_applies_delta_from_stored_row(
+        self, titles, authors
+    ):
+        first, second = titles
+        review = Review.objects.create(
+            title=first, author=authors[0], text='Текст', score=4
+        )
+        stale = Review.objects.get(pk=review.pk)
+        fresh = Review.objects.get(pk=review.pk)
+        fresh.score = 6
+        fresh.save()
+        stale.score = 9
+        stale.save()
+        assert stored(first) == (1, 9), (
+            'Проверьте, что разница считается от сохранённой строки, '
+            'а не от снимка при загрузке'
+        )
+        fresh.title = second
+        fresh.save()
+        assert stored(first) == (0, 0)
+        assert stored(second) == (1, 6)
+        stale.delete()
+        assert stored(second) == (0, 0)
+
+    def test_recalculate_ratings_command(self, titles, authors, capsys):
+        first, second = titles
+        Review.objects.bulk_create([
+            Review(title=first, author=author, text='Текст', score=3)
+            for author in authors
+        ])
+        assert stored(first) == (0, 0)
+        call_command('recalculate_ratings')
+        assert 'Исправлено произведений: 1' in capsys.readouterr().out
+        assert stored(first) == (3, 9)
+        assert stored(second) == (0, 0)
+        call_command('recalculate_ratings', str(first.pk))
+        assert 'Исправлено произведений: 0' in capsys.readouterr().out
+
+    def test_titles_list_query_count_is_constant(self, titles, authors):
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = APIClient().get('/api/v1/titles/')
+            assert response.status_code == 200, response.data
+            return len(queries.captured_queries)
+
+        Review.objects.create(
+            title=titles[0], author=authors[0], text='Текст', score=5
+        )
+        small = count_queries()
+        for number in range(5):
+            title = Title.objects.create(
+                name=f'Ещё {number}', year=2000,
+                category=titles[0].category,
+            )
+            for author in authors:
+                Review.objects.create(
+                    title=title, author=author, text='Текст', score=7
+                )
+        assert count_queries() == small, (
+            'Проверьте, что рейтинг не считается отдельным запросом'
+        )
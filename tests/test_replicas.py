@@ -0,0 +1,119 @@
+import pytest
+from api import replicas
+from api.cache import bumped_key, get_cache
+from django.apps import apps
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+from reviews.models import Category, Title
+
+
+def routed_alias(request):
+    """Куда роутер отправит чтение во время обработки запроса."""
+    seen = []
+
+    def get_response(request):
+        seen.append(replicas.ReplicaRouter().db_for_read(Title))
+        return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+    response = replicas.ReplicaMiddleware(get_response)(request)
+    return seen[0], response
+
+
+@pytest.fixture
+def replica(transactional_db, settings):
+    """Отдельная база SQLite в памяти, которая отстаёт от default:
+    записи в default до неё не доходят.
+
+    Роутер не пускает миграции на реплики, поэтому таблицы создаются
+    напрямую. Тесты идут без общей транзакции: внутри неё роутер
+    читает из default.
+    """
+    alias = 'replica1'
+    connections.databases[alias] = dict(
+        connections.databases['default'], NAME=':memory:', TEST={}
+    )
+    with connections[alias].schema_editor() as editor:
+        for model in apps.get_models():
+            editor.create_model(model)
+    settings.DB_REPLICAS = {alias: 1}
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.databases[alias]
+    replicas.down_until.pop(alias, None)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaRouting:
+
+    def test_safe_request_reads_from_replica(self, replica):
+        Category.objects.create(name='Фильм', slug='movie')
+        assert Category.objects.using(replica).count() == 0
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer a')
+        assert routed_alias(request)[0] == replica, (
+            'Проверьте, что GET-запросы читают с реплики'
+        )
+
+    def test_reads_stick_to_primary_after_write(self, replica):
+        factory = RequestFactory()
+        alias, _ = routed_alias(
+            factory.post('/', HTTP_AUTHORIZATION='Bearer b')
+        )
+        assert alias == 'default'
+        assert routed_alias(
+            factory.get('/', HTTP_AUTHORIZATION='Bearer b')
+        )[0] == 'default', 'Проверьте, что после записи клиент читает из default'
+        assert routed_alias(
+            factory.get('/', HTTP_AUTHORIZATION='Bearer c')
+        )[0] == replica, 'Проверьте, что запись не влияет на других клиентов'
+
+    def test_anonymous_stickiness_is_per_client(self, replica):
+        factory = RequestFactory(REMOTE_ADDR='172.18.0.5')
+        _, response = routed_alias(factory.post('/'))
+        cookie = response.cookies[replicas.STICKY_COOKIE]
+        sticky = factory.get('/')
+        sticky.COOKIES[replicas.STICKY_COOKIE] = cookie.value
+        assert routed_alias(sticky)[0] == 'default', (
+            'Проверьте, что аноним после записи читает из default'
+        )
+        assert routed_alias(factory.get('/'))[0] == replica, (
+            'Проверьте, что запись анонима за тем же nginx не переводит '
+            'в default остальных анонимов'
+        )
+
+    def test_unavailable_replica_falls_back_to_primary(self, settings):
+        settings.DB_REPLICAS = {'missing': 1}
+        replicas.down_until['missing'] = float('inf')
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer d')
+        assert routed_alias(request)[0] == 'default', (
+            'Проверьте, что при недоступных репликах чтение идёт в default'
+        )
+        replicas.down_until.pop('missing')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaCache:
+
+    def test_fresh_version_is_not_cached_from_replica(self, replica):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        Title.objects.create(name='Новинка', year=2000, category=category)
+        client = APIClient()
+        # Запись только что сменила версию: ответ строится по default,
+        # хотя реплика ещё не видит произведение.
+        first = client.get('/api/v1/titles/')
+        assert [item['name'] for item in first.data['results']] == [
+            'Новинка'
+        ], 'Проверьте, что сразу после записи список читается из default'
+        assert client.get('/api/v1/titles/').data == first.data
+
+    def test_reads_replica_once_writes_settled(self, replica):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        Title.objects.create(name='Новинка', year=2000, category=category)
+        for resource in ('titles', 'categories'):
+            get_cache().delete(bumped_key(resource))
+        response = APIClient().get('/api/v1/titles/')
+        assert response.data['results'] == [], (
+            'Проверьте, что вне окна после записи чтение идёт с реплики'
+        )
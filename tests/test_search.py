@@ -0,0 +1,74 @@
+import pytest
+from api.facets import FACET_COUNTS
+from rest_framework.test import APIClient
+from reviews.models import Title
+from reviews.search import (create_search_indexes, postgresql_search,
+                            search_index_sql, search_titles)
+
+
+@pytest.fixture
+def titles(make_titles):
+    for name, description in (
+        ('Matrix', 'Фантастика'),
+        ('Матрица', ''),
+        ('Avatar', 'Фильм про matrix и синих людей'),
+        ('Reloaded', 'Вторая часть Matrix'),
+        ('Titanic', 'Драма'),
+    ):
+        make_titles(name, description=description, category=None)
+
+
+def search(text):
+    response = APIClient().get('/api/v1/titles/', {'search': text})
+    assert response.status_code == 200, response.data
+    return [title['name'] for title in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestSubstringSearch:
+
+    def test_name_matches_go_first(self, titles):
+        names = [
+            title.name for title in search_titles(Title.objects.all(), 'MATRIX')
+        ]
+        assert names == ['Matrix', 'Avatar', 'Reloaded'], (
+            'Проверьте, что совпадения в названии идут перед совпадениями '
+            'в описании'
+        )
+
+    def test_search_filter(self, titles):
+        assert search('matrix') == ['Matrix', 'Avatar', 'Reloaded']
+        assert search('Драма') == ['Titanic']
+        assert search('Пираты') == []
+        assert len(search('')) == 5
+
+    def test_indexes_are_skipped_outside_postgresql(self, titles):
+        create_search_indexes()
+        assert search('Titanic') == ['Titanic']
+
+
+class TestPostgresqlSearch:
+
+    def test_vector_follows_subquery_alias(self, postgresql):
+        titles = postgresql_search(Title.objects.all(), 'матрица')
+        for name, counts in FACET_COUNTS.items():
+            sql, _ = counts(
+                titles.order_by().values('pk')
+            ).query.get_compiler(connection=postgresql).as_sql()
+            subquery = sql[sql.index('IN (SELECT'):]
+            assert 'COALESCE(U0."name"' in subquery, name
+            assert '"reviews_title"."name"' not in subquery, (
+                f'Проверьте, что поиск в фасете {name} не ссылается '
+                'на таблицу внешнего запроса'
+            )
+
+    def test_index_matches_query_vector(self, postgresql):
+        sql, params = search_index_sql(postgresql)
+        query, query_params = postgresql_search(
+            Title.objects.all(), 'матрица'
+        ).query.get_compiler(connection=postgresql).as_sql()
+        expression = sql[sql.index('((') + 2:sql.rindex('))')]
+        assert expression.replace('"name"', '"reviews_title"."name"').replace(
+            '"description"', '"reviews_title"."description"'
+        ) in query, 'Проверьте, что индекс строится по выражению из запроса'
+        assert tuple(params) == tuple(query_params[:len(params)])
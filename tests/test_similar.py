@@ -0,0 +1,65 @@
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from reviews.models import Genre, Review, SimilarTitle, User
+from reviews.similarity import build_similar_titles
+
+
+@pytest.fixture
+def titles(make_titles):
+    drama, rock = (
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Рок', slug='rock'),
+    )
+    titles = make_titles(*(f'Произведение {number}' for number in range(4)))
+    titles[0].genre.set([drama])
+    titles[1].genre.set([drama])
+    titles[2].genre.set([drama, rock])
+    titles[3].genre.set([rock])
+    # Первое и третье читали одни и те же люди.
+    for number in range(3):
+        author = User.objects.create(
+            username=f'reader{number}', email=f'reader{number}@yamdb.ru'
+        )
+        for title in (titles[0], titles[2]):
+            Review.objects.create(
+                title=title, author=author, text='Текст', score=7
+            )
+    return titles
+
+
+def similar(title, **params):
+    response = APIClient().get(f'/api/v1/titles/{title.pk}/similar/', params)
+    assert response.status_code == 200, response.data
+    return [item['id'] for item in response.data]
+
+
+@pytest.mark.django_db
+def test_similar_titles_ranked_by_genres_and_reviewers(titles):
+    first, second, third, fourth = titles
+    build_similar_titles()
+    # Общие рецензенты весят больше, чем совпадение жанров.
+    assert similar(first) == [third.pk, second.pk]
+    assert similar(fourth) == [third.pk]
+    assert similar(first, limit=1) == [third.pk]
+
+
+@pytest.mark.django_db
+def test_parallel_build_matches_single_process(titles):
+    build_similar_titles(chunk_size=1)
+    expected = set(
+        SimilarTitle.objects.values_list('title', 'similar')
+    )
+    call_command('build_similar_titles', workers=2, chunk_size=1)
+    assert set(
+        SimilarTitle.objects.values_list('title', 'similar')
+    ) == expected
+
+
+@pytest.mark.django_db
+def test_top_k_and_missing_title(titles):
+    build_similar_titles(top_k=1)
+    assert SimilarTitle.objects.filter(title=titles[0]).count() == 1
+    client = APIClient()
+    assert client.get('/api/v1/titles/0/similar/').status_code == 404
+    assert client.get('/api/v1/titles/abc/similar/').status_code == 404
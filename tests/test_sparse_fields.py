@@ -0,0 +1,47 @@
+import pytest
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def title():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    title = Title.objects.create(name='Фильм', year=2000, category=category)
+    title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+    return title
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_fields_limit_response(self, title):
+        response = APIClient().get('/api/v1/titles/?fields=id,name,rating')
+        assert response.status_code == 200
+        assert response.data['results'] == [
+            {'id': title.pk, 'name': 'Фильм', 'rating': None}
+        ], 'Проверьте, что ?fields= оставляет в ответе только эти поля'
+
+    def test_not_expanded_relations_are_slugs(self, title):
+        response = APIClient().get(
+            '/api/v1/titles/?fields=genre,category&expand=category'
+        )
+        assert response.data['results'] == [{
+            'genre': ['drama'],
+            'category': {'name': 'Фильм', 'slug': 'movie'},
+        }], 'Проверьте, что связи вне ?expand= отдаются слагами'
+
+    def test_unknown_field_rejected(self, title):
+        response = APIClient().get('/api/v1/titles/?fields=id,secret')
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('fast_list', [True, False])
+    @pytest.mark.parametrize('fields', ['', ',', ' '])
+    def test_empty_fields_mean_all(self, title, settings, fast_list, fields):
+        settings.API_FAST_LIST = fast_list
+        client = APIClient()
+        full = client.get('/api/v1/titles/', {'ordering': 'name'})
+        response = client.get('/api/v1/titles/', {'fields': fields})
+        assert response.status_code == 200
+        assert response.data['results'] == full.data['results'], (
+            'Проверьте, что пустой ?fields= возвращает все поля'
+        )
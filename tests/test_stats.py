@@ -0,0 +1,94 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Comment, Review, Title, TitleStats
+from reviews.stats import recalculate_stats
+
+
+@pytest.fixture
+def title(make_titles):
+    title, = make_titles('Книга')
+    return title
+
+
+def get_stats(title):
+    client = APIClient()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f'/api/v1/titles/{title.pk}/stats/')
+    assert response.status_code == 200, response.data
+    return response.data, len(queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_stats_follow_reviews_and_comments(title, authors):
+    data, _ = get_stats(title)
+    assert data['reviews_count'] == 0
+    assert data['rating'] is None
+    first = Review.objects.create(
+        title=title, author=authors[0], text='Текст', score=8
+    )
+    second = Review.objects.create(
+        title=title, author=authors[1], text='Текст', score=3
+    )
+    Comment.objects.create(review=first, author=authors[2], text='Да')
+    Comment.objects.create(review=second, author=authors[2], text='Нет')
+    second = Review.objects.get(pk=second.pk)
+    second.score = 10
+    second.save()
+    first.delete()
+    data, queries = get_stats(title)
+    assert queries == 1
+    assert data['reviews_count'] == 1
+    assert data['comments_count'] == 1
+    assert data['rating'] == 10
+    assert data['scores'][10] == 1
+    assert sum(data['scores'].values()) == 1
+
+
+@pytest.mark.django_db
+def test_moved_comment_moves_counter(title, authors):
+    other = Title.objects.create(name='Другая', year=2000)
+    first = Review.objects.create(
+        title=title, author=authors[0], text='Текст', score=8
+    )
+    second = Review.objects.create(
+        title=other, author=authors[0], text='Текст', score=8
+    )
+    Comment.objects.create(review=first, author=authors[1], text='Да')
+    comment = Comment.objects.get()
+    comment.text = 'Нет'
+    with CaptureQueriesContext(connection) as queries:
+        comment.save()
+    assert not any(
+        'reviews_review' in query['sql'] for query in queries.captured_queries
+    ), 'Проверьте, что правка комментария не загружает отзыв'
+    comment.review = second
+    comment.save()
+    assert get_stats(title)[0]['comments_count'] == 0
+    assert get_stats(other)[0]['comments_count'] == 1
+    comment.delete()
+    assert get_stats(other)[0]['comments_count'] == 0
+    assert recalculate_stats() == 0
+
+
+@pytest.mark.django_db
+def test_recalculate_stats_repairs_counters(title, authors):
+    Review.objects.bulk_create([
+        Review(title=title, author=author, text='Текст', score=5)
+        for author in authors
+    ])
+    assert not TitleStats.objects.exists()
+    assert recalculate_stats() == 1
+    stats = TitleStats.objects.get(title=title)
+    assert stats.score_5 == 3
+    assert stats.rating == 5
+    assert recalculate_stats() == 0
+    TitleStats.objects.update(score_5=0, comments_count=4)
+    assert recalculate_stats([title.pk]) == 1
+    assert TitleStats.objects.get(title=title).comments_count == 0
+
+
+@pytest.mark.django_db
+def test_stats_of_missing_title():
+    assert APIClient().get('/api/v1/titles/0/stats/').status_code == 404
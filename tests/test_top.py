@@ -0,0 +1,101 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from reviews.models import (Category, Genre, RankingPrior, Review, Title,
+                            TitleRanking, User)
+from reviews.rankings import get_prior_mean, rebuild_rankings
+
+
+def review(title, score, number):
+    author = User.objects.create(
+        username=f'{title.pk}-{number}', email=f'{title.pk}-{number}@yamdb.ru'
+    )
+    return Review.objects.create(
+        title=title, author=author, text='Текст', score=score
+    )
+
+
+@pytest.fixture
+def titles(make_titles):
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    # Одна десятка против множества девяток.
+    single, = make_titles('Одна оценка', category=movie)
+    popular, average = make_titles('Много оценок', 'Среднее')
+    popular.genre.set([drama])
+    review(single, 10, 0)
+    for number in range(20):
+        review(popular, 9, number)
+        review(average, 3, number)
+    return single, popular, average
+
+
+def top(**params):
+    response = APIClient().get('/api/v1/titles/top/', params)
+    assert response.status_code == 200, response.data
+    return response.data
+
+
+@pytest.mark.django_db
+def test_many_reviews_beat_single_high_score(titles):
+    single, popular, average = titles
+    rebuild_rankings()
+    data = top()
+    assert [item['id'] for item in data] == [
+        popular.pk, single.pk, average.pk
+    ]
+    assert data[0]['score'] > data[1]['score']
+
+
+@pytest.mark.django_db
+def test_filters_by_genre_and_category(titles):
+    single, popular, _ = titles
+    assert [item['id'] for item in top(genre='drama')] == [popular.pk]
+    assert [item['id'] for item in top(category='movie')] == [single.pk]
+    assert len(top()) == 3
+    assert top(category='movie', genre='drama') == []
+    assert len(top(limit=1)) == 1
+
+
+@pytest.mark.django_db
+def test_rankings_follow_reviews_and_genres(titles):
+    single, popular, _ = titles
+    assert TitleRanking.objects.filter(title=single).count() == 1
+    single.genre.add(Genre.objects.get(slug='drama'))
+    assert TitleRanking.objects.filter(title=single).count() == 2
+    single.reviews.all().delete()
+    assert not TitleRanking.objects.filter(title=single).exists()
+    popular.refresh_from_db()
+    popular.category = Category.objects.get(slug='movie')
+    popular.save()
+    assert [item['id'] for item in top(category='movie')] == [popular.pk]
+
+
+@pytest.mark.django_db
+def test_empty_prior_is_not_stored():
+    title = Title.objects.create(name='Первое', year=2000)
+    assert get_prior_mean() == 0.0
+    assert not RankingPrior.objects.exists()
+    review(title, 8, 0)
+    assert get_prior_mean() == 8
+    assert TitleRanking.objects.get(title=title).score == 8
+
+
+@pytest.mark.django_db
+def test_prior_survives_cache_flush(titles):
+    single, _, _ = titles
+    rebuild_rankings()
+    mean = get_prior_mean()
+    cache.clear()
+    review(single, 1, 1)
+    assert get_prior_mean() == mean, (
+        'Проверьте, что среднее хранится до пересборки, а не в кэше'
+    )
+    rebuild_rankings()
+    assert get_prior_mean() < mean
+
+
+@pytest.mark.django_db
+def test_bad_limit():
+    response = APIClient().get('/api/v1/titles/top/', {'limit': 'много'})
+    assert response.status_code == 400